@@ -21,9 +21,38 @@ Refer to `imgix.UrlBuilder` class documentation for all the supported options.
 
 from ._version import __version__
 
-from .urlbuilder import UrlBuilder, target_widths
+# The public names are imported on first access (PEP 562), so that
+# `import imgix` stays cheap for short-lived processes that may not use
+# every class.
+_LAZY_ATTRIBUTES = {
+    'BuilderRegistry': '.registry',
+    'ImgixParams': '.params',
+    'UrlBuilder': '.urlbuilder',
+    'UrlTemplate': '.template',
+    'target_widths': '.urlbuilder',
+}
 
 __all__ = [
+    'BuilderRegistry',
+    'ImgixParams',
     'UrlBuilder',
+    'UrlTemplate',
     'target_widths',
     '__version__']
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name))
+
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
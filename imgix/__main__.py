@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+The `imgix` command.
+
+    $ imgix resign urls.csv -o resigned.csv
+"""
+import argparse
+import os
+import sys
+
+from . import resign
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="imgix", description="imgix command-line tools."
+    )
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    resign.add_arguments(
+        commands.add_parser(
+            "resign",
+            help="re-sign the imgix URLs in a file with a new sign key",
+            description="Re-sign the signed imgix URLs in each line of a "
+            "file, e.g. a CSV file or a database dump, with a new sign key. "
+            "Output lines are written in input order.",
+        )
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "resign":
+        return resign.run(args, os.environ)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Cache backends for the URLs and srcset attributes created by `UrlBuilder`.
+
+A backend stores strings under string keys. Pass one as the
+`cache_backend` argument of `UrlBuilder` to share generated URLs and
+srcsets between processes, e.g. between the workers of an application
+server:
+
+    >>> from imgix.backends import SQLiteBackend
+    >>> backend = SQLiteBackend("/var/cache/imgix.sqlite3", ttl=86400)
+    >>> builder = UrlBuilder("demos.imgix.net", cache_backend=backend)
+
+Lookups are batched: `UrlBuilder.create_urls` and
+`UrlBuilder.create_srcsets` fetch the results of a whole chunk of images
+with a single `get_many` call, and store the missing ones with a single
+`set_many` call.
+
+Any object implementing `get_many` and `set_many` can be used as a
+backend, so an adapter for memcached or Redis is a few lines long:
+
+    >>> class RedisBackend(CacheBackend):
+    ...     def __init__(self, client, ttl=None):
+    ...         self.client = client
+    ...         self.ttl = ttl
+    ...     def get_many(self, keys):
+    ...         values = self.client.mget(keys)
+    ...         return {
+    ...             key: value.decode("utf-8")
+    ...             for key, value in zip(keys, values)
+    ...             if value is not None
+    ...         }
+    ...     def set_many(self, mapping):
+    ...         with self.client.pipeline() as pipe:
+    ...             for key, value in mapping.items():
+    ...                 pipe.set(key, value, ex=self.ttl)
+    ...             pipe.execute()
+"""
+import os
+import threading
+import time
+
+from .cache import LRUCache
+
+# The default maximum number of entries kept by a `MemoryBackend`.
+MEMORY_BACKEND_SIZE = 65536
+
+# SQLite limits the number of parameters of a statement to 999 in older
+# versions; keys are looked up in batches of at most this many.
+_SQLITE_BATCH_SIZE = 500
+
+# Connections inherited from a parent process. They must not be used, nor
+# closed, after `fork()`, so they are kept referenced until exit.
+_inherited_connections = []
+
+
+class CacheBackend(object):
+    """
+    Store of generated URLs and srcset attributes, keyed by string.
+
+    Keys are short ASCII strings, at most 80 characters long, and values
+    are `str`. Missing and expired keys are simply left out of the
+    results of `get_many`.
+
+    Methods
+    -------
+    get_many(keys)
+        Return a dict of the cached values of `keys`.
+    set_many(mapping)
+        Cache the values of `mapping`.
+    delete_many(keys)
+        Remove `keys` from the cache.
+    clear()
+        Remove all the entries.
+    """
+
+    def get_many(self, keys):
+        """
+        Return the cached values of `keys`.
+
+        Parameters
+        ----------
+        keys : list of str
+
+        Returns
+        -------
+        dict
+            The values of the keys that are cached, by key.
+        """
+        raise NotImplementedError
+
+    def set_many(self, mapping):
+        """
+        Cache the values of `mapping`.
+
+        Parameters
+        ----------
+        mapping : dict
+            Values (str) by key (str).
+        """
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        """
+        Remove `keys` from the cache.
+
+        Parameters
+        ----------
+        keys : list of str
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all the entries."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process backend keeping the most recently used entries.
+
+    The reference implementation of `CacheBackend`, e.g. for tests or
+    single-process applications.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries kept. (default `MEMORY_BACKEND_SIZE`)
+    ttl : float or None
+        When provided, entries expire this many seconds after they were
+        set. (default None, never)
+
+    Methods
+    -------
+    cache_info()
+        Return the cache statistics.
+    """
+
+    def __init__(self, maxsize=MEMORY_BACKEND_SIZE, ttl=None):
+        self._cache = LRUCache(maxsize, ttl)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get_many(self, keys):
+        found = {}
+        get = self._cache.get
+        for key in keys:
+            value = get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, mapping):
+        set_ = self._cache.set
+        for key, value in mapping.items():
+            set_(key, value)
+
+    def delete_many(self, keys):
+        pop = self._cache.pop
+        for key in keys:
+            pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def cache_info(self):
+        """
+        Return the cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Hits, misses, evictions and sizes of the cache.
+        """
+        return self._cache.cache_info()
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend storing entries in an SQLite database file.
+
+    The file can be shared by all the processes of a host, e.g. by the
+    workers of an application server, so that each URL and srcset is
+    created once per host rather than once per process. The database is
+    opened in write-ahead logging mode, so that readers do not block
+    writers; each thread uses its own connection, and connections are
+    opened again in forked processes, e.g. in pre-forked workers.
+
+    Parameters
+    ----------
+    path : str
+        Path to the database file, created if missing.
+    ttl : float or None
+        When provided, entries expire this many seconds after they were
+        set. Expired entries are ignored, and deleted by `purge`.
+        (default None, never)
+    table : str
+        Name of the table holding the entries. (default 'imgix_cache')
+    timeout : float
+        Seconds to wait for a lock held by another process.
+        (default 5.0)
+
+    Methods
+    -------
+    purge()
+        Delete the expired entries.
+    close()
+        Close the connection of the calling thread.
+    """
+
+    def __init__(self, path, ttl=None, table="imgix_cache", timeout=5.0):
+        if not table.isidentifier():
+            raise ValueError("`table` must be a valid SQL identifier")
+
+        self._path = path
+        self._ttl = ttl
+        self._table = table
+        self._timeout = timeout
+        self._local = threading.local()
+
+        # Not kept: the backend is typically created before the workers
+        # are forked.
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS %s ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+                    % table
+                )
+        finally:
+            connection.close()
+
+    def _connect(self):
+        import sqlite3
+
+        connection = sqlite3.connect(self._path, timeout=self._timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _connection(self):
+        local = self._local
+        connection = getattr(local, "connection", None)
+        pid = os.getpid()
+        if connection is None or local.pid != pid:
+            if connection is not None:
+                # SQLite connections must not be carried across `fork()`.
+                _inherited_connections.append(connection)
+            connection = self._connect()
+            local.connection = connection
+            local.pid = pid
+        return connection
+
+    def get_many(self, keys):
+        found = {}
+        if not keys:
+            return found
+
+        connection = self._connection()
+        now = time.time()
+        for start in range(0, len(keys), _SQLITE_BATCH_SIZE):
+            batch = keys[start:start + _SQLITE_BATCH_SIZE]
+            rows = connection.execute(
+                "SELECT key, value FROM %s WHERE key IN (%s) "
+                "AND (expires IS NULL OR expires > ?)"
+                % (self._table, ",".join("?" * len(batch))),
+                (*batch, now),
+            )
+            found.update(rows)
+        return found
+
+    def set_many(self, mapping):
+        if not mapping:
+            return
+
+        expires = None if self._ttl is None else time.time() + self._ttl
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO %s (key, value, expires) "
+                "VALUES (?, ?, ?)" % self._table,
+                [(key, value, expires) for key, value in mapping.items()],
+            )
+
+    def delete_many(self, keys):
+        with self._connection() as connection:
+            connection.executemany(
+                "DELETE FROM %s WHERE key = ?" % self._table,
+                [(key,) for key in keys],
+            )
+
+    def clear(self):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM %s" % self._table)
+
+    def purge(self):
+        """
+        Delete the expired entries.
+
+        Returns
+        -------
+        int
+            Number of entries deleted.
+        """
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "DELETE FROM %s WHERE expires <= ?" % self._table,
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def close(self):
+        """Close the connection of the calling thread."""
+        local = self._local
+        connection = getattr(local, "connection", None)
+        if connection is not None and local.pid == os.getpid():
+            connection.close()
+        local.connection = None
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the imgix hot paths.
+
+Run all the benchmarks and print a report:
+
+    $ python -m imgix.bench
+
+Save the results as JSON, then compare another version against them:
+
+    $ python -m imgix.bench --json before.json
+    $ pip install --upgrade imgix
+    $ python -m imgix.bench --compare before.json
+
+For each benchmark the report lists the throughput (calls per second), the
+per-call latency percentiles and the peak number of bytes allocated while
+making a single call. It also lists the memory held by each `UrlBuilder`
+and `UrlHelper` instance, for instances sharing their configuration.
+
+The 'import/*' benchmarks measure the time taken to import imgix in a new
+interpreter, as reported by `python -X importtime`:
+
+    $ python -m imgix.bench -k 'import/*'
+"""
+import argparse
+import fnmatch
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ._version import __version__
+from .urlbuilder import UrlBuilder, target_widths
+from .urlhelper import UrlHelper
+
+DOMAIN = "demos.imgix.net"
+SIGN_KEY = "test1234"
+PATH = "/images/products/1234/bridge.png"
+PROXY_PATH = (
+    "https://assets.example.com/catalog/images/products/1234/"
+    "bridge-with-a-rather-long-file-name.png?v=1234567890"
+)
+UNICODE_PATH = "/üsers/1/米国でのパーティーします。.png"
+PARAMS = {"auto": "format,compress", "fit": "crop", "w": 400, "h": 300}
+BASE64_PARAMS = {
+    "txt64": "Limited edition — free shipping on all orders over $50!",
+    "mark64": "https://assets.imgix.net/logos/watermark.png",
+    "blend64": "https://assets.imgix.net/textures/paper.png",
+    "w": 400,
+}
+
+
+# The code run by each import-time benchmark, in a new interpreter.
+IMPORT_BENCHMARKS = [
+    ("import/imgix", "import imgix"),
+    ("import/UrlBuilder", "from imgix import UrlBuilder"),
+    ("import/UrlHelper", "from imgix.urlhelper import UrlHelper"),
+]
+
+
+def _benchmarks():
+    # Return the (name, callable) pairs of all the benchmarks.
+    plain = UrlBuilder(DOMAIN)
+    signed = UrlBuilder(DOMAIN, sign_key=SIGN_KEY)
+    cached = UrlBuilder(DOMAIN, sign_key=SIGN_KEY, srcset_cache_size=16)
+    helper = UrlHelper(DOMAIN, PATH, params=PARAMS)
+    signed_helper = UrlHelper(DOMAIN, PATH, sign_key=SIGN_KEY, params=PARAMS)
+    mutable_helper = UrlHelper(DOMAIN, PATH, sign_key=SIGN_KEY, params=PARAMS)
+    qualities = {"variable_qualities": {1: 80, 2: 60, 3: 40}}
+    dprs = {"device_pixel_ratios": [1, 2, 3]}
+    widths = itertools.count(1)
+
+    def set_parameter_and_render():
+        mutable_helper.set_parameter("w", next(widths))
+        return str(mutable_helper)
+
+    return [
+        ("create_url/plain", lambda: plain.create_url(PATH, PARAMS)),
+        ("create_url/signed", lambda: signed.create_url(PATH, PARAMS)),
+        ("create_url/proxy", lambda: signed.create_url(PROXY_PATH, PARAMS)),
+        (
+            "create_url/unicode",
+            lambda: signed.create_url(UNICODE_PATH, PARAMS),
+        ),
+        (
+            "create_url/base64",
+            lambda: signed.create_url(PATH, BASE64_PARAMS),
+        ),
+        ("create_srcset/pairs", lambda: plain.create_srcset(PATH)),
+        ("create_srcset/pairs-signed", lambda: signed.create_srcset(PATH)),
+        (
+            "create_srcset/widths",
+            lambda: signed.create_srcset(PATH, widths=[320, 640, 1280]),
+        ),
+        (
+            "create_srcset/range",
+            lambda: signed.create_srcset(PATH, start=500, stop=2000, tol=0.2),
+        ),
+        (
+            "create_srcset/dpr",
+            lambda: signed.create_srcset(PATH, {"w": 400}),
+        ),
+        (
+            "create_srcset/dpr-variable-qualities",
+            lambda: signed.create_srcset(PATH, {"w": 400}, qualities),
+        ),
+        (
+            "create_srcset/dpr-device-pixel-ratios",
+            lambda: signed.create_srcset(PATH, {"w": 400}, dprs),
+        ),
+        (
+            "create_srcset/cached",
+            lambda: cached.create_srcset(PATH, {"w": 400}),
+        ),
+        ("target_widths/default", lambda: target_widths()),
+        (
+            "target_widths/custom",
+            lambda: target_widths(start=300, stop=3000, tol=0.1),
+        ),
+        ("UrlHelper.__str__/plain", lambda: str(helper)),
+        ("UrlHelper.__str__/signed", lambda: str(signed_helper)),
+        ("UrlHelper.__str__/set_parameter", set_parameter_and_render),
+    ]
+
+
+def _percentile(sorted_values, percent):
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def _measure(func, iterations):
+    # Warm up any memoization and caches.
+    for _ in range(min(iterations, 100)):
+        func()
+
+    clock = time.perf_counter
+    latencies = []
+    start = clock()
+    for _ in range(iterations):
+        t0 = clock()
+        func()
+        latencies.append(clock() - t0)
+    elapsed = clock() - start
+    latencies.sort()
+
+    return {
+        "ops_per_sec": iterations / elapsed,
+        "p50_us": _percentile(latencies, 50) * 1e6,
+        "p90_us": _percentile(latencies, 90) * 1e6,
+        "p99_us": _percentile(latencies, 99) * 1e6,
+        "alloc_bytes": _measure_allocations(func),
+    }
+
+
+def _measure_allocations(func, calls=20):
+    # Peak number of bytes allocated during a single call, averaged over
+    # `calls` calls. `tracemalloc.reset_peak` requires Python 3.9.
+    if not hasattr(tracemalloc, "reset_peak"):
+        return None
+
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - current
+    finally:
+        tracemalloc.stop()
+
+    return total / calls
+
+
+def _instance_sizes(count=1000):
+    # Bytes held per instance by `count` builders and helpers sharing the
+    # same configuration. Requires `tracemalloc.reset_peak`, like
+    # `_measure_allocations`, for consistency between both figures.
+    if not hasattr(tracemalloc, "reset_peak"):
+        return None
+
+    factories = [
+        ("UrlBuilder", lambda: UrlBuilder(DOMAIN, sign_key=SIGN_KEY)),
+        (
+            "UrlHelper",
+            lambda: UrlHelper(DOMAIN, PATH, sign_key=SIGN_KEY, params=PARAMS),
+        ),
+    ]
+    sizes = {}
+    for name, factory in factories:
+        # The shared configuration is not accounted to the instances.
+        keep = factory()
+        instances = [None] * count
+        tracemalloc.start()
+        try:
+            current, _ = tracemalloc.get_traced_memory()
+            for i in range(count):
+                instances[i] = factory()
+            held, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        sizes[name] = (held - current) / count
+        del instances, keep
+    return sizes
+
+
+def _import_time(code, runs):
+    # Median time, in microseconds, spent importing modules while running
+    # `code` in `runs` new interpreters, i.e. the time of the top-level
+    # imports reported after the interpreter startup (`site`). Modules
+    # imported lazily, after `imgix` itself, are reported as separate
+    # top-level imports.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [root, env.get("PYTHONPATH")])
+    )
+
+    totals = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            env=env,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        total = 0
+        started = False
+        for line in process.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) != 3 or not fields[0].startswith("import time:"):
+                continue
+            name = fields[2].rstrip()
+            # Top-level imports only: nested imports are indented.
+            if name.startswith("  "):
+                continue
+            if started:
+                total += int(fields[1])
+            elif name == " site":
+                started = True
+        totals.append(total)
+
+    totals.sort()
+    return totals[len(totals) // 2]
+
+
+def run(iterations=10000, pattern="*", import_runs=5):
+    """
+    Run the benchmarks whose names match the `pattern` glob.
+
+    Parameters
+    ----------
+    iterations : int
+        Number of timed calls per benchmark. (default 10000)
+    pattern : str
+        Shell-style pattern matched against benchmark names, e.g.
+        'create_srcset/*'. (default '*')
+    import_runs : int
+        Number of new interpreters started by each 'import/*' benchmark.
+        (default 5)
+
+    Returns
+    -------
+    dict
+        JSON serializable report with the library and Python versions,
+        the results of each benchmark, keyed by name, the bytes held
+        per instance (`instance_bytes`) and the median import times in
+        microseconds (`import_us`).
+    """
+    results = {}
+    for name, func in _benchmarks():
+        if fnmatch.fnmatchcase(name, pattern):
+            results[name] = _measure(func, iterations)
+
+    import_us = {}
+    for name, code in IMPORT_BENCHMARKS:
+        if fnmatch.fnmatchcase(name, pattern):
+            import_us[name] = _import_time(code, import_runs)
+
+    return {
+        "imgix": __version__,
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "results": results,
+        "instance_bytes": _instance_sizes(),
+        "import_us": import_us,
+    }
+
+
+def compare(report, baseline):
+    """
+    Compare the throughput of `report` against `baseline`.
+
+    Parameters
+    ----------
+    report : dict
+        Report returned by `run`.
+    baseline : dict
+        Report returned by `run`, e.g. for a previous version.
+
+    Returns
+    -------
+    dict
+        Ratio of the throughput in `report` to the throughput in
+        `baseline` for each benchmark present in both; above 1.0 is
+        faster.
+    """
+    ratios = {}
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before:
+            ratios[name] = result["ops_per_sec"] / before["ops_per_sec"]
+    return ratios
+
+
+def format_report(report, ratios=None):
+    """
+    Format `report` as a plain text table.
+
+    Parameters
+    ----------
+    report : dict
+        Report returned by `run`.
+    ratios : dict or None
+        Throughput ratios returned by `compare`.
+
+    Returns
+    -------
+    str
+    """
+    header = "%-40s %12s %9s %9s %9s %11s" % (
+        "benchmark", "ops/sec", "p50 us", "p90 us", "p99 us", "alloc B",
+    )
+    if ratios is not None:
+        header += " %8s" % "vs base"
+
+    lines = [
+        "imgix %s, Python %s" % (report["imgix"], report["python"]),
+        header,
+    ]
+    for name, result in report["results"].items():
+        alloc = result["alloc_bytes"]
+        line = "%-40s %12.0f %9.2f %9.2f %9.2f %11s" % (
+            name,
+            result["ops_per_sec"],
+            result["p50_us"],
+            result["p90_us"],
+            result["p99_us"],
+            "-" if alloc is None else "%.0f" % alloc,
+        )
+        if ratios is not None:
+            ratio = ratios.get(name)
+            line += " %8s" % ("-" if ratio is None else "%.2fx" % ratio)
+        lines.append(line)
+
+    sizes = report.get("instance_bytes")
+    if sizes:
+        lines.append("")
+        lines.append("%-40s %12s" % ("instance", "bytes"))
+        for name, size in sorted(sizes.items()):
+            lines.append("%-40s %12.0f" % (name, size))
+
+    import_us = report.get("import_us")
+    if import_us:
+        lines.append("")
+        lines.append("%-40s %12s" % ("import", "us"))
+        for name, us in import_us.items():
+            lines.append("%-40s %12d" % (name, us))
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m imgix.bench",
+        description="Benchmark the imgix URL and srcset hot paths.",
+    )
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=10000,
+        help="timed calls per benchmark (default: 10000)",
+    )
+    parser.add_argument(
+        "-k",
+        "--pattern",
+        default="*",
+        help="only run benchmarks matching this glob, e.g. 'create_url/*'",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="write the report as JSON to PATH"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="compare against a JSON report written by --json",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(iterations=args.iterations, pattern=args.pattern)
+
+    ratios = None
+    if args.compare:
+        with open(args.compare) as fp:
+            ratios = compare(report, json.load(fp))
+
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+
+    print(format_report(report, ratios))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
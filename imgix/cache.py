@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from collections import OrderedDict, namedtuple
+from time import monotonic
+
+
+class CacheInfo(
+    namedtuple(
+        "CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize"]
+    )
+):
+    """Statistics of an imgix cache."""
+
+    __slots__ = ()
+
+    @property
+    def hit_rate(self):
+        """The ratio of hits to lookups, or 0.0 before any lookup."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache(object):
+    """
+    Bounded, thread-safe least-recently-used cache.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of entries kept. Once exceeded, the least recently
+        used entry is evicted.
+    ttl : float or None
+        When provided, entries expire this many seconds after they were
+        set; looking up an expired entry is a miss. (default None, entries
+        never expire)
+    timer : callable
+        Clock returning the current time in seconds, used to expire
+        entries. (default `time.monotonic`)
+
+    Methods
+    -------
+    get(key, default=None)
+        Return the value cached for `key`, or `default`.
+    set(key, value)
+        Cache `value` for `key`.
+    pop(key, default=None)
+        Remove and return the value cached for `key`, or `default`.
+    discard_if(predicate)
+        Remove the entries whose key matches `predicate`.
+    clear()
+        Remove all entries and reset the statistics.
+    cache_info()
+        Return the cache statistics as a `CacheInfo` named tuple.
+    """
+
+    def __init__(self, maxsize, ttl=None, timer=monotonic):
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("`maxsize` must be a positive `int`")
+        if ttl is not None and not ttl > 0:
+            raise ValueError("`ttl` must be a positive number of seconds")
+
+        self._maxsize = maxsize
+        # With a `ttl`, values are stored as (value, expiry time) pairs.
+        self._ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        if self._ttl is None:
+            return key in self._data
+        entry = self._data.get(key)
+        return entry is not None and entry[1] > self._timer()
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for `key`, or `default` on a miss.
+
+        Parameters
+        ----------
+        key : hashable
+        default : object
+
+        Returns
+        -------
+        object
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            if self._ttl is not None:
+                value, expires = value
+                if expires <= self._timer():
+                    del self._data[key]
+                    self._misses += 1
+                    return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Cache `value` for `key`, evicting the least recently used entry
+        if the cache is full.
+
+        Parameters
+        ----------
+        key : hashable
+        value : object
+        """
+        if self._ttl is not None:
+            value = (value, self._timer() + self._ttl)
+        with self._lock:
+            data = self._data
+            if key in data:
+                data.move_to_end(key)
+            data[key] = value
+            if len(data) > self._maxsize:
+                data.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key, default=None):
+        """
+        Remove and return the value cached for `key`, or `default`.
+
+        Parameters
+        ----------
+        key : hashable
+        default : object
+
+        Returns
+        -------
+        object
+        """
+        with self._lock:
+            value = self._data.pop(key, default)
+        if self._ttl is not None and value is not default:
+            value, expires = value
+            if expires <= self._timer():
+                return default
+        return value
+
+    def discard_if(self, predicate):
+        """
+        Remove the entries whose key matches `predicate`.
+
+        Every key is tested, so this is meant for occasional, explicit
+        invalidation rather than for the hot path.
+
+        Parameters
+        ----------
+        predicate : callable
+            Called with each key; the entry is removed if it returns a
+            true value.
+
+        Returns
+        -------
+        int
+            Number of entries removed.
+        """
+        with self._lock:
+            data = self._data
+            keys = [key for key in data if predicate(key)]
+            for key in keys:
+                del data[key]
+            return len(keys)
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def cache_info(self):
+        """
+        Return the cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Named tuple of `hits`, `misses`, `evictions`, `maxsize` and
+            `currsize`.
+        """
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._maxsize,
+                len(self._data),
+            )
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import threading
+import weakref
+
+from ._version import __version__
+from .encoding import render_query
+from .signing import create_signer
+
+# Live configurations, keyed by their fields. Entries disappear once no
+# builder or helper refers to them anymore.
+_configs = weakref.WeakValueDictionary()
+_configs_lock = threading.Lock()
+
+
+class Config(object):
+    """
+    Immutable configuration shared by `UrlBuilder` and `UrlHelper`
+    instances.
+
+    Configurations are interned: `get_config` returns the same object for
+    the same domain, scheme, sign key and library parameter setting, so
+    that builders and helpers of the same domain share their origin,
+    signer and encoded library parameter rather than each keeping a copy.
+
+    Attributes
+    ----------
+    domain : str
+    scheme : str
+    sign_key : str, tuple of str or None
+    include_library_param : bool
+    origin : str
+        Scheme and domain, e.g. 'https://demos.imgix.net'.
+    signer : Signer, KeySet or None
+        Signer for `sign_key`, see `imgix.signing.create_signer`.
+    base_params : dict
+        Encoded parameters appended to every URL, i.e. 'ixlib'. Must not
+        be modified.
+    default_query : str
+        Query string of the URLs created without params, i.e. of
+        `base_params`.
+    """
+
+    __slots__ = (
+        "domain",
+        "scheme",
+        "sign_key",
+        "include_library_param",
+        "origin",
+        "signer",
+        "base_params",
+        "default_query",
+        "__weakref__",
+    )
+
+    def __init__(self, domain, scheme, sign_key, include_library_param):
+        init = object.__setattr__
+        init(self, "domain", domain)
+        init(self, "scheme", scheme)
+        init(self, "sign_key", sign_key)
+        init(self, "include_library_param", include_library_param)
+        init(self, "origin", scheme + "://" + domain if scheme else domain)
+        init(self, "signer", create_signer(sign_key))
+        base_params = {}
+        if include_library_param:
+            base_params["ixlib"] = "python-" + __version__
+        init(self, "base_params", base_params)
+        init(self, "default_query", render_query(base_params))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("`Config` objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("`Config` objects are immutable")
+
+    def __reduce__(self):
+        return (
+            get_config,
+            (
+                self.domain,
+                self.scheme,
+                self.sign_key,
+                self.include_library_param,
+            ),
+        )
+
+    def __repr__(self):
+        return "Config(domain=%r, scheme=%r, include_library_param=%r)" % (
+            self.domain,
+            self.scheme,
+            self.include_library_param,
+        )
+
+
+def get_config(domain, scheme="https", sign_key=None,
+               include_library_param=True):
+    """
+    Return the interned `Config` for the supplied settings.
+
+    Parameters
+    ----------
+    domain : str
+    scheme : str
+        (default 'https')
+    sign_key : str, sequence of str or None
+        A sequence of keys is stored as a tuple. (default None)
+    include_library_param : bool
+        (default `True`)
+
+    Returns
+    -------
+    Config
+    """
+    if sign_key is not None and not isinstance(sign_key, str):
+        sign_key = tuple(sign_key)
+    include_library_param = bool(include_library_param)
+
+    key = (domain, scheme, sign_key, include_library_param)
+    config = _configs.get(key)
+    if config is None:
+        with _configs_lock:
+            config = _configs.get(key)
+            if config is None:
+                config = Config(*key)
+                _configs[key] = config
+    return config
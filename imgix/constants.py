@@ -1,10 +1,11 @@
-import re
-
-DOMAIN_PATTERN = re.compile(
-            r'^(?:[a-z\d\-_]{1,62}\.){0,125}'
-            r'(?:[a-z\d](?:\-(?=\-*[a-z\d])|[a-z]|\d){0,62}\.)'
-            r'[a-z\d]{1,63}$'
-        )
+# The regular expression of the domain names accepted by imgix. Domains
+# are validated by `validators.is_valid_domain`, which gives the same
+# results in linear time; `DOMAIN_PATTERN` is compiled on first access.
+_DOMAIN_PATTERN = (
+    r'^(?:[a-z\d\-_]{1,62}\.){0,125}'
+    r'(?:[a-z\d](?:\-(?=\-*[a-z\d])|[a-z]|\d){0,62}\.)'
+    r'[a-z\d]{1,63}$'
+)
 
 # The srcset width tolerance dictates the _maximum tolerated size_
 # difference between an image's downloaded size and its rendered size.
@@ -40,3 +41,15 @@ SRCSET_TARGET_WIDTHS = [
     328, 380, 441, 512, 594, 689, 799, 927,
     1075, 1247, 1446, 1678, 1946, 2257, 2619,
     3038, 3524, 4087, 4741, 5500, 6380, 7401, 8192]
+
+
+def __getattr__(name):
+    if name == "DOMAIN_PATTERN":
+        import re
+
+        global DOMAIN_PATTERN
+        DOMAIN_PATTERN = re.compile(_DOMAIN_PATTERN)
+        return DOMAIN_PATTERN
+    raise AttributeError(
+        "module %r has no attribute %r" % (__name__, name)
+    )
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from urllib.parse import quote_plus, quote
+
+from .cache import CacheInfo
+
+# The maximum number of encoded parameter keys kept in memory.
+KEY_CACHE_SIZE = 1024
+
+# The maximum number of encoded string parameter values kept in memory.
+VALUE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def encode_param_key(key):
+    """
+    Percent-encode a query parameter `key`.
+
+    Encoded keys are memoized.
+
+    Parameters
+    ----------
+    key : str
+
+    Returns
+    -------
+    str
+    """
+    return quote(key)
+
+
+def encode_param_value(key, value):
+    """
+    Encode a query parameter `value` for the already encoded `key`.
+
+    Values of keys ending with '64' are base64 encoded (URL-safe alphabet,
+    without padding), all other values are percent-encoded. Encoded string
+    values are memoized, see `value_cache_info`.
+
+    Parameters
+    ----------
+    key : str
+        Encoded parameter key, see `encode_param_key`.
+    value : object
+        Parameter value, stringified before encoding.
+
+    Returns
+    -------
+    str
+    """
+    # Only `str` values are memoized: the memo does not tell apart
+    # values that compare equal, such as `1`, `1.0` and `True`.
+    if value.__class__ is str:
+        return _encode_str_value(key, value)
+
+    # Integers never contain characters that need to be quoted.
+    if type(value) is int and not key.endswith("64"):
+        return str(value)
+
+    return _encode_str_value.__wrapped__(key, str(value))
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def _encode_str_value(key, value):
+    if key.endswith("64"):
+        from base64 import urlsafe_b64encode
+
+        # First we call encode on value to get a bytes-like object,
+        # then after replacing any padding characters that may
+        # be present, we call decode to get back a string object.
+        return (
+            urlsafe_b64encode(value.encode("utf-8"))
+            .replace(b"=", b"")
+            .decode("utf-8")
+        )
+
+    # quote_plus will encode SPACE (' ') as PLUS (+). If a
+    # PLUS (+) is present, e.g. "Futura+Condensed Medium",
+    # it will be encoded as "Futura%2BCondensed+Medium".
+    return quote_plus(value).replace("+", "%20")
+
+
+def value_cache_info():
+    """
+    Return the statistics of the encoded parameter value memo.
+
+    Returns
+    -------
+    CacheInfo
+        Hits, misses, evictions and sizes of the memo. Its `hit_rate`
+        is the ratio of memoized encodings to lookups.
+    """
+    info = _encode_str_value.cache_info()
+    return CacheInfo(
+        info.hits,
+        info.misses,
+        max(0, info.misses - info.currsize),
+        info.maxsize,
+        info.currsize,
+    )
+
+
+def clear_value_cache():
+    """Remove all memoized parameter keys and values."""
+    encode_param_key.cache_clear()
+    _encode_str_value.cache_clear()
+
+
+def encode_params(params):
+    """
+    Encode the keys and values of the `params` dict.
+
+    Parameters
+    ----------
+    params : dict
+
+    Returns
+    -------
+    dict
+        Mapping of encoded keys to encoded values.
+    """
+    encoded = {}
+    for k, v in params.items():
+        key = encode_param_key(k)
+        encoded[key] = encode_param_value(key, v)
+    return encoded
+
+
+def render_query(encoded):
+    """
+    Join encoded parameters into a query string sorted by key.
+
+    Parameters
+    ----------
+    encoded : dict
+        Mapping of encoded keys to encoded values.
+
+    Returns
+    -------
+    str
+        The query string, including its leading '?', or '' if `encoded`
+        is empty.
+    """
+    if not encoded:
+        return ""
+    return "?" + "&".join([k + "=" + encoded[k] for k in sorted(encoded)])
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import threading
+
+# Counter names.
+CREATE_URL_CALLS = "create_url.calls"
+CREATE_URLS_CALLS = "create_urls.calls"
+CREATE_SRCSET_CALLS = "create_srcset.calls"
+ITER_SRCSET_CALLS = "iter_srcset.calls"
+URL_HELPER_CALLS = "url_helper.calls"
+PATH_CACHE_HITS = "path_cache.hits"
+PATH_CACHE_MISSES = "path_cache.misses"
+SRCSET_CACHE_HITS = "srcset_cache.hits"
+SRCSET_CACHE_MISSES = "srcset_cache.misses"
+CACHE_BACKEND_HITS = "cache_backend.hits"
+CACHE_BACKEND_MISSES = "cache_backend.misses"
+
+# Timed stage names.
+STAGE_SANITIZE = "sanitize"
+STAGE_PARAMS = "params"
+STAGE_SIGN = "sign"
+STAGE_SRCSET = "srcset"
+
+
+class MetricsSink(object):
+    """
+    Receive the counters and stage timings of imgix URL generation.
+
+    Instrumentation is opt-in: pass a sink as the `metrics` argument of
+    `UrlBuilder` or `UrlHelper`. Any object implementing `increment` and
+    `timing` can be used as a sink, e.g. an adapter for a StatsD client.
+
+    Methods
+    -------
+    increment(name, value=1)
+        Increment the counter `name` by `value`.
+    timing(name, seconds)
+        Record that the stage `name` took `seconds`.
+    """
+
+    def increment(self, name, value=1):
+        """
+        Increment the counter `name` by `value`.
+
+        Parameters
+        ----------
+        name : str
+            Counter name, e.g. 'create_url.calls' or 'path_cache.hits'.
+        value : int
+        """
+        raise NotImplementedError
+
+    def timing(self, name, seconds):
+        """
+        Record that the stage `name` took `seconds`.
+
+        Parameters
+        ----------
+        name : str
+            Stage name: 'sanitize', 'params', 'sign' or 'srcset'.
+        seconds : float
+        """
+        raise NotImplementedError
+
+
+class InMemorySink(MetricsSink):
+    """
+    Thread-safe sink that aggregates metrics in memory.
+
+    Methods
+    -------
+    snapshot()
+        Return a copy of the aggregated counters and timings.
+    reset()
+        Reset all the counters and timings.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def timing(self, name, seconds):
+        with self._lock:
+            count, total = self._timings.get(name, (0, 0.0))
+            self._timings[name] = (count + 1, total + seconds)
+
+    def snapshot(self):
+        """
+        Return a copy of the aggregated counters and timings.
+
+        Returns
+        -------
+        dict
+            `counters` maps counter names to their values; `timings` maps
+            stage names to dicts of their `count` and total `seconds`.
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {
+                    name: {"count": count, "seconds": total}
+                    for name, (count, total) in self._timings.items()
+                },
+            }
+
+    def reset(self):
+        """Reset all the counters and timings."""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+class PrometheusTextSink(InMemorySink):
+    """
+    In-memory sink that renders the Prometheus text exposition format.
+
+    Counters are exposed as `imgix_<name>_total`, e.g.
+    `imgix_create_url_calls_total`, and stage timings as the summary
+    `imgix_stage_seconds` with a `stage` label.
+
+    Parameters
+    ----------
+    prefix : str
+        Prefix of the metric names. (default 'imgix')
+
+    Methods
+    -------
+    render()
+        Return the metrics in the Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix="imgix"):
+        super(PrometheusTextSink, self).__init__()
+        self._prefix = prefix
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        for name in sorted(snapshot["counters"]):
+            metric = "%s_%s_total" % (self._prefix, _metric_name(name))
+            lines.append("# TYPE %s counter" % metric)
+            lines.append("%s %d" % (metric, snapshot["counters"][name]))
+
+        timings = snapshot["timings"]
+        if timings:
+            metric = self._prefix + "_stage_seconds"
+            lines.append("# TYPE %s summary" % metric)
+            for name in sorted(timings):
+                label = '{stage="%s"}' % name
+                lines.append(
+                    "%s_count%s %d" % (metric, label, timings[name]["count"])
+                )
+                lines.append(
+                    "%s_sum%s %r" % (metric, label, timings[name]["seconds"])
+                )
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
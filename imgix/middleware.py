@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+WSGI and ASGI middleware rejecting requests with an invalid imgix
+signature.
+
+Put the middleware in front of a self-hosted image proxy to check the 's'
+parameter of each request exactly as imgix does, i.e. as `UrlBuilder`
+signs URLs. Requests without a valid signature are answered with
+'403 Forbidden' and never reach the application:
+
+    >>> from imgix.middleware import WSGISignatureMiddleware
+    >>> app = WSGISignatureMiddleware(app, sign_key="test1234")
+
+Signatures are computed over the path and query string as they were sent,
+so the middleware reads the raw request target (`RAW_URI` or
+`REQUEST_URI` for WSGI, `raw_path` for ASGI) when the server provides it.
+"""
+from urllib.parse import quote, quote_plus
+
+from .cache import LRUCache
+from .signing import create_signer, split_signed_url
+
+# The maximum number of verified (path, query string) pairs kept in memory.
+VERDICT_CACHE_SIZE = 4096
+
+_FORBIDDEN_BODY = b"Forbidden"
+_FORBIDDEN_HEADERS = [
+    ("Content-Type", "text/plain; charset=utf-8"),
+    ("Content-Length", str(len(_FORBIDDEN_BODY))),
+]
+
+
+class SignatureVerifier(object):
+    """
+    Verify imgix signatures of request targets, with a cache of verdicts.
+
+    Valid (path, query string) pairs are kept in a bounded LRU cache, so
+    that repeated requests for hot assets are accepted without hashing.
+    Invalid pairs are not cached: a flood of forged URLs costs one hash
+    per request, but cannot evict valid entries.
+
+    Parameters
+    ----------
+    sign_key : str or sequence of str
+        The key used to sign image URLs. With several keys, signatures
+        made with any of them are valid, see `imgix.signing.KeySet`.
+    cache_size : int
+        Maximum number of verdicts to keep; 0 disables the cache.
+        (default `VERDICT_CACHE_SIZE`)
+
+    Methods
+    -------
+    verify(path, query_string)
+        Return whether the signature in `query_string` is valid.
+    cache_info()
+        Return the verdict cache statistics.
+    """
+
+    def __init__(self, sign_key, cache_size=VERDICT_CACHE_SIZE):
+        if not sign_key:
+            raise ValueError("Verifying URLs requires a `sign_key`.")
+
+        self._signer = create_signer(sign_key)
+        self._cache = LRUCache(cache_size) if cache_size else None
+
+    def verify(self, path, query_string):
+        """
+        Return whether the signature in `query_string` is valid for
+        `path`.
+
+        Parameters
+        ----------
+        path : str
+            Encoded request path, e.g. '/bridge.png'.
+        query_string : str
+            Encoded query string, without its leading '?'. The 's'
+            parameter must be the last parameter.
+
+        Returns
+        -------
+        bool
+        """
+        cache = self._cache
+        key = (path, query_string)
+        if cache is not None and cache.get(key) is not None:
+            return True
+
+        parts = split_signed_url(path + "?" + query_string)
+        if parts is None:
+            return False
+
+        _, path, query_string, signature = parts
+        if not self._signer.verify(path, query_string, signature):
+            return False
+
+        if cache is not None:
+            cache.set(key, True)
+        return True
+
+    def cache_info(self):
+        """
+        Return the verdict cache statistics.
+
+        Returns
+        -------
+        CacheInfo or None
+            `None` if the verifier was created with a `cache_size` of 0.
+        """
+        if self._cache is None:
+            return None
+        return self._cache.cache_info()
+
+
+class WSGISignatureMiddleware(object):
+    """
+    WSGI middleware answering requests with an invalid imgix signature
+    with '403 Forbidden'.
+
+    Parameters
+    ----------
+    app : callable
+        The WSGI application to protect.
+    sign_key : str or sequence of str
+        The key used to sign image URLs.
+    cache_size : int
+        Maximum number of verdicts to keep. (default `VERDICT_CACHE_SIZE`)
+
+    Attributes
+    ----------
+    verifier : SignatureVerifier
+    """
+
+    def __init__(self, app, sign_key, cache_size=VERDICT_CACHE_SIZE):
+        self.app = app
+        self.verifier = SignatureVerifier(sign_key, cache_size)
+
+    def __call__(self, environ, start_response):
+        raw_uri = environ.get("RAW_URI") or environ.get("REQUEST_URI")
+        if raw_uri:
+            path, _, query_string = raw_uri.partition("?")
+            path = path.partition("#")[0]
+        else:
+            # PATH_INFO holds the decoded path as latin-1 characters.
+            path = environ.get("SCRIPT_NAME", "") + environ.get(
+                "PATH_INFO", ""
+            )
+            path = _encode_path(path.encode("latin-1"))
+            query_string = environ.get("QUERY_STRING", "")
+
+        if self.verifier.verify(path, query_string):
+            return self.app(environ, start_response)
+
+        start_response("403 Forbidden", list(_FORBIDDEN_HEADERS))
+        return [_FORBIDDEN_BODY]
+
+
+class ASGISignatureMiddleware(object):
+    """
+    ASGI middleware answering HTTP requests with an invalid imgix
+    signature with '403 Forbidden'.
+
+    WebSocket connections are checked the same way, and closed before
+    they are accepted if their signature is invalid. Only 'lifespan'
+    events are passed through unchecked; connections of any other type
+    are dropped.
+
+    Parameters
+    ----------
+    app : callable
+        The ASGI application to protect.
+    sign_key : str or sequence of str
+        The key used to sign image URLs.
+    cache_size : int
+        Maximum number of verdicts to keep. (default `VERDICT_CACHE_SIZE`)
+
+    Attributes
+    ----------
+    verifier : SignatureVerifier
+    """
+
+    def __init__(self, app, sign_key, cache_size=VERDICT_CACHE_SIZE):
+        self.app = app
+        self.verifier = SignatureVerifier(sign_key, cache_size)
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope["type"]
+        if scope_type == "lifespan":
+            await self.app(scope, receive, send)
+            return
+
+        raw_path = scope.get("raw_path")
+        if raw_path:
+            path = raw_path.decode("latin-1")
+        else:
+            path = _encode_path(scope["path"].encode("utf-8"))
+        query_string = scope.get("query_string", b"").decode("latin-1")
+
+        if self.verifier.verify(path, query_string):
+            await self.app(scope, receive, send)
+            return
+
+        if scope_type == "websocket":
+            # Closing before accepting makes the server answer the
+            # handshake with '403 Forbidden'.
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        if scope_type != "http":
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 403,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in _FORBIDDEN_HEADERS
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _FORBIDDEN_BODY})
+
+
+def _encode_path(path):
+    # Re-encode a decoded request path the way `UrlBuilder` encodes it.
+    # Exact for the paths created by `UrlBuilder`, unless path encoding
+    # was disabled.
+    if path.startswith(b"/"):
+        path = path[1:]
+    if path.startswith(b"http"):
+        return "/" + quote_plus(path)
+    return "/" + quote(path, safe="/&$;=@,")
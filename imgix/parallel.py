@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Create imgix URLs and srcsets for large catalogs on all CPU cores.
+
+The builder is shipped to each worker process once, when the worker
+starts. Items are then sent to the workers in chunks and the results are
+streamed back in input order. At most `max_pending` chunks are in flight
+at any time, so memory use is bounded regardless of the catalog size:
+
+    >>> from imgix import UrlBuilder
+    >>> from imgix.parallel import create_urls
+    >>> builder = UrlBuilder("demos.imgix.net", sign_key="test1234")
+    >>> for url in create_urls(builder, paths, {"w": 400}, workers=8):
+    ...     out.write(url + "\\n")
+"""
+import os
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# The builder of the current worker process.
+_builder = None
+
+
+def create_urls(
+    builder,
+    items,
+    params={},
+    options={},
+    workers=None,
+    chunk_size=1000,
+    max_pending=None,
+):
+    """
+    Create URLs with `builder` for `items` using a pool of processes.
+
+    Parameters
+    ----------
+    builder : UrlBuilder
+    items : iterable
+        Paths (str) or (path, params) tuples, see `UrlBuilder.create_urls`.
+    params : dict
+        Dictionary specifying URL parameters shared by all the items.
+        (default None)
+    options : dict
+        Dictionary specifying URL options such as disabled_path_encoding.
+        (default None)
+    workers : int or None
+        Number of worker processes. (default `os.cpu_count()`)
+    chunk_size : int
+        Number of items sent to a worker at a time. (default 1000)
+    max_pending : int or None
+        Maximum number of chunks submitted but not yet yielded.
+        (default twice the number of workers)
+
+    Yields
+    ------
+    str
+        imgix URL for each item, in input order.
+    """
+    return map_chunks(
+        _create_urls_chunk,
+        items,
+        (params, options),
+        workers,
+        chunk_size,
+        max_pending,
+        initializer=_init_worker,
+        initargs=(builder,),
+    )
+
+
+def create_srcsets(
+    builder,
+    items,
+    params={},
+    options={},
+    workers=None,
+    chunk_size=100,
+    max_pending=None,
+    **kwargs
+):
+    """
+    Create srcset attributes with `builder` for `items` using a pool of
+    processes.
+
+    Parameters
+    ----------
+    builder : UrlBuilder
+    items : iterable
+        Paths (str) or (path, params) tuples. Per-item params take
+        precedence over the shared `params`.
+    params : dict
+        Dictionary specifying URL parameters shared by all the items.
+        (default None)
+    options : dict
+        Options passed to `UrlBuilder.create_srcset`. (default None)
+    workers : int or None
+        Number of worker processes. (default `os.cpu_count()`)
+    chunk_size : int
+        Number of items sent to a worker at a time. (default 100)
+    max_pending : int or None
+        Maximum number of chunks submitted but not yet yielded.
+        (default twice the number of workers)
+    **kwargs
+        `widths`, `start`, `stop`, `tol` and `disable_variable_quality`,
+        passed to `UrlBuilder.create_srcset`.
+
+    Yields
+    ------
+    str
+        Srcset attribute string for each item, in input order.
+    """
+    return map_chunks(
+        _create_srcsets_chunk,
+        items,
+        (params, options, kwargs),
+        workers,
+        chunk_size,
+        max_pending,
+        initializer=_init_worker,
+        initargs=(builder,),
+    )
+
+
+def map_chunks(
+    func,
+    items,
+    args=(),
+    workers=None,
+    chunk_size=1000,
+    max_pending=None,
+    initializer=None,
+    initargs=(),
+):
+    """
+    Apply `func` to chunks of `items` in a pool of processes and yield the
+    results in input order.
+
+    Parameters
+    ----------
+    func : callable
+        Picklable function called as `func(chunk, *args)`, where `chunk` is
+        a list of items. It must return an iterable of results.
+    items : iterable
+    args : tuple
+        Extra arguments passed to `func` with each chunk.
+    workers : int or None
+        Number of worker processes. (default `os.cpu_count()`)
+    chunk_size : int
+        Number of items sent to a worker at a time. (default 1000)
+    max_pending : int or None
+        Maximum number of chunks submitted but not yet yielded.
+        (default twice the number of workers)
+    initializer : callable or None
+        Called as `initializer(*initargs)` once in each worker process.
+    initargs : tuple
+
+    Yields
+    ------
+    object
+        The results of `func` for each chunk, flattened, in input order.
+    """
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("`chunk_size` must be a positive `int`")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    if max_pending < 1:
+        raise ValueError("`max_pending` must be a positive `int`")
+
+    return _iter_chunks(
+        func,
+        iter(items),
+        args,
+        workers,
+        chunk_size,
+        max_pending,
+        initializer,
+        initargs,
+    )
+
+
+def _iter_chunks(
+    func,
+    items,
+    args,
+    workers,
+    chunk_size,
+    max_pending,
+    initializer,
+    initargs,
+):
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    )
+    pending = deque()
+    try:
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(func, chunk, *args))
+
+            # Wait for the oldest chunk before submitting more work.
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _init_worker(builder):
+    global _builder
+    _builder = builder
+
+
+def _create_urls_chunk(chunk, params, options):
+    return list(
+        _builder.create_urls(chunk, params, options, chunk_size=len(chunk))
+    )
+
+
+def _create_srcsets_chunk(chunk, params, options, kwargs):
+    srcsets = []
+    for item in chunk:
+        if isinstance(item, str):
+            path, item_params = item, params
+        else:
+            path, item_params = item[0], {**params, **item[1]}
+        srcsets.append(
+            _builder.create_srcset(path, item_params, options, **kwargs)
+        )
+    return srcsets
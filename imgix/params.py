@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+from collections.abc import Mapping
+
+from .encoding import encode_params, render_query
+
+
+class ImgixParams(Mapping):
+    """
+    Immutable, hashable imgix URL parameters, encoded once.
+
+    `ImgixParams` can be passed wherever a params dict is accepted, e.g.
+    to `UrlBuilder.create_url` or `UrlBuilder.create_srcset`. The keys and
+    values are encoded when the object is created and the sorted query
+    string is computed once, so that the URLs created from the same
+    params only encode the path and sign:
+
+      >>> params = ImgixParams(auto="format,compress", w=400)
+      >>> builder.create_url("/bridge.png", params)
+      https://demos.imgix.net/bridge.png?auto=format%2Ccompress&w=400
+      >>> builder.create_url("/bridge.png", params.replace(w=800))
+      https://demos.imgix.net/bridge.png?auto=format%2Ccompress&w=800
+
+    Two `ImgixParams` are equal if they produce the same query string;
+    unlike dicts, `{'w': 1}` and `{'w': True}` are different params.
+
+    Parameters
+    ----------
+    params : dict or Mapping
+        URL parameters. (default {})
+    **kwargs
+        More URL parameters, which take precedence over `params`.
+
+    Attributes
+    ----------
+    query_string : str
+        The encoded query string, sorted by key.
+
+    Methods
+    -------
+    replace(params=None, **kwargs)
+        Return a copy with `params` and keyword arguments added or
+        replaced.
+    """
+
+    __slots__ = ("_params", "_encoded", "_query", "_hash", "_base_query")
+
+    def __init__(self, params={}, **kwargs):
+        if kwargs:
+            params = {**params, **kwargs}
+        else:
+            params = dict(params)
+        self._init(params, encode_params(params))
+
+    def _init(self, params, encoded):
+        init = object.__setattr__
+        init(self, "_params", params)
+        init(self, "_encoded", encoded)
+        init(self, "_query", render_query(encoded))
+        init(self, "_hash", None)
+        # The query string rendered with the last base params, see
+        # `_query_with`.
+        init(self, "_base_query", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("`ImgixParams` objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("`ImgixParams` objects are immutable")
+
+    @classmethod
+    def _from_encoded(cls, params, encoded):
+        instance = cls.__new__(cls)
+        instance._init(params, encoded)
+        return instance
+
+    def __getitem__(self, key):
+        return self._params[key]
+
+    def __iter__(self):
+        return iter(self._params)
+
+    def __len__(self):
+        return len(self._params)
+
+    def __contains__(self, key):
+        return key in self._params
+
+    def __eq__(self, other):
+        if isinstance(other, ImgixParams):
+            return self._query == other._query
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(self._query))
+        return self._hash
+
+    def __repr__(self):
+        return "ImgixParams(%r)" % (self._params,)
+
+    def __reduce__(self):
+        return (self.__class__, (self._params,))
+
+    @property
+    def query_string(self):
+        """
+        The encoded query string, sorted by key.
+
+        Returns
+        -------
+        str
+            The query string, including its leading '?', or '' if there
+            are no params.
+        """
+        return self._query
+
+    def replace(self, params={}, **kwargs):
+        """
+        Return a copy with `params` and keyword arguments added or
+        replaced.
+
+        Only the new values are encoded.
+
+        Parameters
+        ----------
+        params : dict or Mapping
+            (default {})
+        **kwargs
+            Take precedence over `params`.
+
+        Returns
+        -------
+        ImgixParams
+        """
+        if kwargs:
+            params = {**params, **kwargs}
+        if not params:
+            return self
+        if params.__class__ is ImgixParams:
+            encoded = params._encoded
+        else:
+            encoded = encode_params(params)
+        return self._from_encoded(
+            {**self._params, **params}, {**self._encoded, **encoded}
+        )
+
+    def _query_with(self, base):
+        # The query string including the encoded `base` params, such as
+        # 'ixlib', which take precedence. The result for the last `base`
+        # is kept, since a builder always passes the same base params.
+        if not base:
+            return self._query
+
+        cached = self._base_query
+        if cached is not None and cached[0] == base:
+            return cached[1]
+
+        query = render_query({**self._encoded, **base})
+        object.__setattr__(self, "_base_query", (dict(base), query))
+        return query
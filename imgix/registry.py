@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from .cache import LRUCache
+from .urlbuilder import UrlBuilder
+
+# The default maximum number of builders kept by a `BuilderRegistry`.
+REGISTRY_SIZE = 1024
+
+
+class BuilderRegistry(object):
+    """
+    Thread-safe cache of configured `UrlBuilder` instances, keyed by
+    tenant.
+
+    Builders are created lazily, on the first lookup of a tenant, from
+    the configuration given to `register` or returned by `loader`, and
+    the least recently used builders are evicted once more than `maxsize`
+    are kept. Looking up a cached builder costs about as much as a dict
+    lookup; in particular, the domain is validated once per builder
+    rather than once per request.
+
+      >>> registry = BuilderRegistry(include_library_param=False)
+      >>> registry.register("acme", "acme.imgix.net", sign_key="secret")
+      >>> registry.get("acme").create_url("/bridge.png", {"w": 100})
+      'https://acme.imgix.net/bridge.png?w=100&s=...'
+
+    Parameters
+    ----------
+    loader : callable or None
+        Called as `loader(tenant)` for tenants that were not registered.
+        It returns a dict of `UrlBuilder` arguments, including `domain`,
+        or `None` if the tenant is unknown. Calls are not serialized, so
+        the loader may be slow, e.g. query a database. (default None)
+    maxsize : int
+        Maximum number of builders kept. (default `REGISTRY_SIZE`)
+    **defaults
+        `UrlBuilder` arguments shared by all the tenants, e.g.
+        `include_library_param` or `path_cache_size`. Tenant arguments
+        take precedence.
+
+    Methods
+    -------
+    register(tenant, domain, **kwargs)
+        Register the `UrlBuilder` arguments of `tenant`.
+    unregister(tenant)
+        Forget `tenant` and its builder.
+    get(tenant)
+        Return the builder of `tenant`.
+    invalidate(tenant)
+        Evict the builder of `tenant`, e.g. after a key rotation.
+    clear()
+        Evict all the builders and reset the statistics.
+    cache_info()
+        Return the builder cache statistics.
+    """
+
+    def __init__(self, loader=None, maxsize=REGISTRY_SIZE, **defaults):
+        self._loader = loader
+        self._defaults = defaults
+        self._configs = {}
+        self._builders = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._builders)
+
+    def __contains__(self, tenant):
+        return tenant in self._configs or tenant in self._builders
+
+    def __getitem__(self, tenant):
+        return self.get(tenant)
+
+    def register(self, tenant, domain, **kwargs):
+        """
+        Register the `UrlBuilder` arguments of `tenant`.
+
+        The builder is created, and its domain validated, on the first
+        lookup. A builder already created for `tenant` is evicted.
+
+        Parameters
+        ----------
+        tenant : hashable
+        domain : str
+        **kwargs
+            Other `UrlBuilder` arguments, e.g. `sign_key`.
+        """
+        with self._lock:
+            self._configs[tenant] = dict(kwargs, domain=domain)
+            self._builders.pop(tenant)
+
+    def unregister(self, tenant):
+        """
+        Forget `tenant` and its builder.
+
+        Parameters
+        ----------
+        tenant : hashable
+        """
+        with self._lock:
+            self._configs.pop(tenant, None)
+            self._builders.pop(tenant)
+
+    def get(self, tenant):
+        """
+        Return the builder of `tenant`.
+
+        Parameters
+        ----------
+        tenant : hashable
+
+        Returns
+        -------
+        UrlBuilder
+
+        Raises
+        ------
+        KeyError
+            If `tenant` was not registered and the `loader` does not know
+            it either.
+        ValueError
+            If the domain of `tenant` is not a valid domain name.
+        """
+        builder = self._builders.get(tenant)
+        if builder is not None:
+            return builder
+
+        registered = config = self._configs.get(tenant)
+        if config is None and self._loader is not None:
+            config = self._loader(tenant)
+        if config is None:
+            raise KeyError(tenant)
+
+        builder = UrlBuilder(**dict(self._defaults, **config))
+
+        with self._lock:
+            # Builders created concurrently for the same tenant: keep the
+            # first one, so that every caller shares the same instance.
+            if tenant in self._builders:
+                return self._builders.get(tenant)
+            # Do not cache a builder for a configuration replaced by
+            # `register` or `unregister` in the meantime.
+            if self._configs.get(tenant) is registered:
+                self._builders.set(tenant, builder)
+        return builder
+
+    def invalidate(self, tenant):
+        """
+        Evict the builder of `tenant`.
+
+        The builder is created again, from the registered configuration
+        or by calling the `loader`, on the next lookup.
+
+        Parameters
+        ----------
+        tenant : hashable
+        """
+        with self._lock:
+            self._builders.pop(tenant)
+
+    def clear(self):
+        """Evict all the builders and reset the statistics."""
+        with self._lock:
+            self._builders.clear()
+
+    def cache_info(self):
+        """
+        Return the builder cache statistics.
+
+        Returns
+        -------
+        CacheInfo
+            Hits, misses, evictions and sizes of the builder cache.
+        """
+        return self._builders.cache_info()
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Re-sign stored imgix URLs with a new sign key.
+
+Signed URLs found in each line of the input, e.g. a CSV file or a database
+dump, are re-signed: the old 's' parameter is dropped and a signature made
+with the new key is appended. Everything else in the line is written back
+unchanged. Lines are processed in chunks on a pool of processes and
+written in input order, with a bounded number of chunks in flight:
+
+    $ export IMGIX_SIGN_KEY=new-key
+    $ imgix resign urls.csv -o resigned.csv --domain demos.imgix.net
+
+Or from Python:
+
+    >>> from imgix.resign import resign_file
+    >>> resign_file("urls.csv", "resigned.csv", "new-key")
+"""
+import contextlib
+import io
+import mmap
+import re
+import sys
+
+from . import parallel
+from .signing import create_signer, split_signed_url
+
+# A character of the path or query of a URL. Another URL may start right
+# after the current one, e.g. in a CSV field list: 'http://' and
+# 'https://' are only part of the URL directly after a '/', as in
+# '/http://example.com/image.png' proxy paths with disabled encoding.
+_URL_CHAR = r"(?:(?!https?://)[^\s\"'<>?#]|(?<=/)https?://)"
+
+# Absolute imgix URLs ending with a signature, possibly HTML-escaped
+# ('&amp;s=...'). The URL ends right after the signature, so that trailing
+# CSV fields are never considered part of it, and the host is captured to
+# filter URLs by domain.
+_SIGNED_URL = re.compile(
+    r"https?://([^/\s\"'<>?#]+)" + _URL_CHAR + r"*"
+    r"\?(?:" + _URL_CHAR + r"*?&(?:amp;)?)?s=[0-9a-fA-F]{32}"
+    r"(?![0-9a-zA-Z])"
+)
+
+# The signer of the current worker process.
+_signer = None
+
+
+def resign_url(url, sign_key):
+    """
+    Return `url` signed with `sign_key`.
+
+    The old signature, if any, is replaced. Unsigned URLs are signed.
+
+    Parameters
+    ----------
+    url : str
+        Absolute imgix URL or path ('/image.png?w=100&s=...').
+    sign_key : str, sequence of str or Signer
+        The new key. Of a sequence, the first key is used.
+
+    Returns
+    -------
+    str
+    """
+    return _resign_url(url, _as_signer(sign_key))
+
+
+def resign_line(line, sign_key, domains=None):
+    """
+    Re-sign all the signed imgix URLs in `line`.
+
+    Parameters
+    ----------
+    line : str
+    sign_key : str, sequence of str or Signer
+        The new key. Of a sequence, the first key is used.
+    domains : iterable of str or None
+        Only re-sign URLs of these domains. (default all domains)
+
+    Returns
+    -------
+    str
+        `line` with the signatures of its URLs replaced.
+    """
+    signer = _as_signer(sign_key)
+    domains = None if domains is None else frozenset(domains)
+    return _resign_line(line, signer, domains)
+
+
+def resign_lines(
+    lines,
+    sign_key,
+    domains=None,
+    workers=None,
+    chunk_size=10000,
+    max_pending=None,
+):
+    """
+    Re-sign the signed imgix URLs in `lines` using a pool of processes.
+
+    Parameters
+    ----------
+    lines : iterable of str
+    sign_key : str or sequence of str
+        The new key. Of a sequence, the first key is used.
+    domains : iterable of str or None
+        Only re-sign URLs of these domains. (default all domains)
+    workers : int or None
+        Number of worker processes; with 1, lines are processed in the
+        calling process. (default `os.cpu_count()`)
+    chunk_size : int
+        Number of lines sent to a worker at a time. (default 10000)
+    max_pending : int or None
+        Maximum number of chunks submitted but not yet yielded.
+        (default twice the number of workers)
+
+    Yields
+    ------
+    str
+        The re-signed lines, in input order.
+    """
+    if not sign_key:
+        raise ValueError("`sign_key` is required to re-sign URLs")
+    domains = None if domains is None else frozenset(domains)
+
+    if workers == 1:
+        signer = create_signer(sign_key)
+        return (_resign_line(line, signer, domains) for line in lines)
+
+    return parallel.map_chunks(
+        _resign_chunk,
+        lines,
+        (domains,),
+        workers,
+        chunk_size,
+        max_pending,
+        initializer=_init_worker,
+        initargs=(sign_key,),
+    )
+
+
+def resign_file(
+    input_path,
+    output_path,
+    sign_key,
+    domains=None,
+    use_mmap=False,
+    **kwargs
+):
+    """
+    Re-sign the signed imgix URLs in the file at `input_path` and write
+    the result to `output_path`.
+
+    See `resign_stream`.
+
+    Returns
+    -------
+    int
+        Number of lines written.
+    """
+    with open(input_path, "rb") as src, open(output_path, "wb") as dst:
+        return resign_stream(src, dst, sign_key, domains, use_mmap, **kwargs)
+
+
+def resign_stream(
+    src,
+    dst,
+    sign_key,
+    domains=None,
+    use_mmap=False,
+    **kwargs
+):
+    """
+    Re-sign the signed imgix URLs read from `src` and write the result to
+    `dst`.
+
+    Lines are decoded as UTF-8; undecodable bytes and line endings are
+    written back unchanged.
+
+    Parameters
+    ----------
+    src : binary file
+    dst : binary file
+    sign_key : str or sequence of str
+        The new key. Of a sequence, the first key is used.
+    domains : iterable of str or None
+        Only re-sign URLs of these domains. (default all domains)
+    use_mmap : bool
+        Read `src`, which must be a regular file, through a memory map
+        rather than its buffer. (default False)
+    **kwargs
+        `workers`, `chunk_size` and `max_pending`, see `resign_lines`.
+
+    Returns
+    -------
+    int
+        Number of lines written.
+    """
+    if use_mmap:
+        lines = _iter_mmap_lines(src)
+    else:
+        lines = _text_wrapper(src)
+
+    out = _text_wrapper(dst)
+    count = 0
+    try:
+        write = out.write
+        for line in resign_lines(lines, sign_key, domains, **kwargs):
+            write(line)
+            count += 1
+    finally:
+        out.flush()
+        # Leave `dst` open for the caller.
+        out.detach()
+        if not use_mmap:
+            lines.detach()
+    return count
+
+
+def add_arguments(parser):
+    """Add the arguments of the `resign` command to `parser`."""
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="file to re-sign, '-' for standard input (default: -)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="file to write, '-' for standard output (default: -)",
+    )
+    parser.add_argument(
+        "--key",
+        help="new sign key (default: the value of the --key-env variable)",
+    )
+    parser.add_argument(
+        "--key-env",
+        default="IMGIX_SIGN_KEY",
+        metavar="NAME",
+        help="environment variable holding the new sign key "
+        "(default: IMGIX_SIGN_KEY)",
+    )
+    parser.add_argument(
+        "--domain",
+        action="append",
+        dest="domains",
+        metavar="DOMAIN",
+        help="only re-sign URLs of DOMAIN; may be repeated",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10000,
+        help="lines sent to a worker at a time (default: 10000)",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="read the input file through a memory map",
+    )
+
+
+def run(args, environ):
+    """Run the `resign` command for the parsed `args`."""
+    sign_key = args.key or environ.get(args.key_env)
+    if not sign_key:
+        raise SystemExit(
+            "imgix resign: no sign key, set %s or pass --key" % args.key_env
+        )
+
+    if args.mmap and args.input == "-":
+        raise SystemExit("imgix resign: --mmap requires an input file")
+
+    with contextlib.ExitStack() as stack:
+        if args.input == "-":
+            src = sys.stdin.buffer
+        else:
+            src = stack.enter_context(open(args.input, "rb"))
+        if args.output == "-":
+            dst = sys.stdout.buffer
+        else:
+            dst = stack.enter_context(open(args.output, "wb"))
+
+        resign_stream(
+            src,
+            dst,
+            sign_key,
+            args.domains,
+            use_mmap=args.mmap,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+    return 0
+
+
+def _as_signer(sign_key):
+    if hasattr(sign_key, "sign"):
+        return sign_key
+    if not sign_key:
+        raise ValueError("`sign_key` is required to re-sign URLs")
+    return create_signer(sign_key)
+
+
+def _resign_url(url, signer):
+    parts = split_signed_url(url)
+    if parts is None:
+        url = url.partition("#")[0]
+        start = -1 if url.startswith("/") else url.find("://")
+        start = 0 if start == -1 else start + 3
+        query_start = url.find("?", start)
+        if query_start == -1:
+            query_start = len(url)
+        path_start = url.find("/", start, query_start)
+        if path_start == -1:
+            path_start = query_start if start else 0
+        parts = (
+            url[:path_start],
+            url[path_start:query_start],
+            url[query_start:],
+            None,
+        )
+
+    origin, path, query_string, _ = parts
+    signature = signer.sign(path, query_string)
+    separator = "&s=" if query_string else "?s="
+    return origin + path + query_string + separator + signature
+
+
+def _resign_line(line, signer, domains):
+    if "s=" not in line:
+        return line
+
+    def replace(match):
+        url = match.group(0)
+        if domains is not None and match.group(1) not in domains:
+            return url
+        if "&amp;" not in url:
+            return _resign_url(url, signer)
+
+        # HTML-escaped URL, e.g. in a dump of rendered pages: sign the
+        # actual URL and escape it back. URLs mixing escaped and bare
+        # '&' are ambiguous, and left unchanged.
+        if url.count("&") != url.count("&amp;"):
+            return url
+        url = _resign_url(url.replace("&amp;", "&"), signer)
+        return url.replace("&", "&amp;")
+
+    return _SIGNED_URL.sub(replace, line)
+
+
+def _init_worker(sign_key):
+    global _signer
+    _signer = create_signer(sign_key)
+
+
+def _resign_chunk(chunk, domains):
+    return [_resign_line(line, _signer, domains) for line in chunk]
+
+
+def _iter_mmap_lines(fp):
+    # Empty files cannot be memory mapped.
+    if not fp.seek(0, io.SEEK_END):
+        return
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for line in iter(mapped.readline, b""):
+            yield line.decode("utf-8", "surrogateescape")
+
+
+def _text_wrapper(buffer):
+    return io.TextIOWrapper(
+        buffer, encoding="utf-8", errors="surrogateescape", newline=""
+    )
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+
+# The maximum number of per-path hash states kept by a `Signer`.
+SIGNER_PATH_CACHE_SIZE = 1024
+
+
+class Signer(object):
+    """
+    Compute imgix URL signatures from pre-seeded MD5 states.
+
+    An imgix signature is the MD5 hex digest of the sign key, the
+    prefixed path and the query string, concatenated in that order.
+    Rather than hashing that whole string for every URL, the `Signer`
+    hashes the sign key once and keeps the resulting state around. The
+    state is then `copy()`'d for each URL so that only the remainder of
+    the signature base has to be hashed.
+
+    The most recently used paths are seeded as well (sign key + path),
+    which makes signing many URLs for the same path, i.e. the candidates
+    of a srcset, only as expensive as hashing their query strings.
+
+    Parameters
+    ----------
+    sign_key : str
+        The key used to sign image URLs.
+    path_cache_size : int
+        Maximum number of path-seeded states to keep.
+        (default `SIGNER_PATH_CACHE_SIZE`)
+
+    Methods
+    -------
+    seed(path)
+        Return a hash state seeded with the sign key and `path`.
+    sign(path, query_string)
+        Return the signature for `path` and `query_string`.
+    verify(path, query_string, signature)
+        Return whether `signature` is valid for `path` and `query_string`.
+    """
+
+    def __init__(self, sign_key, path_cache_size=SIGNER_PATH_CACHE_SIZE):
+        # Imported on first use, to keep `import imgix` fast.
+        import hashlib
+
+        self._key_state = hashlib.md5(sign_key.encode("utf-8"))
+        self._path_states = {}
+        self._path_cache_size = path_cache_size
+
+    def seed(self, path=""):
+        """
+        Return a hash state seeded with the sign key and `path`.
+
+        The returned state is shared and must be `copy()`'d before
+        being updated.
+
+        Parameters
+        ----------
+        path : str
+            Prefixed (leading forward slash) and encoded image path.
+
+        Returns
+        -------
+        hashlib.md5
+        """
+        if not path:
+            return self._key_state
+
+        state = self._path_states.get(path)
+        if state is None:
+            state = self._key_state.copy()
+            state.update(path.encode("utf-8"))
+            if len(self._path_states) >= self._path_cache_size:
+                self._path_states.clear()
+            self._path_states[path] = state
+
+        return state
+
+    def sign(self, path, query_string=""):
+        """
+        Return the signature for `path` and `query_string`.
+
+        Parameters
+        ----------
+        path : str
+            Prefixed (leading forward slash) and encoded image path.
+        query_string : str
+            Encoded query string, including its leading '?'.
+
+        Returns
+        -------
+        str
+            The hex digest used as the value of the 's' parameter.
+        """
+        state = self.seed(path).copy()
+        if query_string:
+            state.update(query_string.encode("utf-8"))
+        return state.hexdigest()
+
+    def verify(self, path, query_string, signature):
+        """
+        Return whether `signature` is valid for `path` and `query_string`.
+
+        The signatures are compared in constant time.
+
+        Parameters
+        ----------
+        path : str
+            Prefixed (leading forward slash) and encoded image path.
+        query_string : str
+            Encoded query string without the signature, including its
+            leading '?'.
+        signature : str
+            Value of the 's' parameter.
+
+        Returns
+        -------
+        bool
+        """
+        if not signature.isascii():
+            return False
+
+        import hmac
+
+        return hmac.compare_digest(self.sign(path, query_string), signature)
+
+
+class KeySet(object):
+    """
+    Ordered set of sign keys for zero-downtime key rotation.
+
+    URLs are signed with the first (current) key, but signatures made
+    with any of the keys are accepted. Each key keeps its own pre-seeded
+    `Signer`, so verifying against N keys costs N hashes of the path and
+    query string, which are encoded once.
+
+    A `KeySet` can be used wherever a `Signer` is expected.
+
+    Parameters
+    ----------
+    sign_keys : sequence of str
+        The keys, current key first. Each must be a non-empty `str`.
+
+    Methods
+    -------
+    seed(path)
+        Return a hash state seeded with the current key and `path`.
+    sign(path, query_string)
+        Return the signature made with the current key.
+    match(path, query_string, signature)
+        Return the index of the key that made `signature`, or `None`.
+    verify(path, query_string, signature)
+        Return whether `signature` was made with any of the keys.
+    """
+
+    def __init__(self, sign_keys):
+        if not sign_keys:
+            raise ValueError("`sign_keys` must contain at least one key")
+        _check_keys(sign_keys)
+
+        self._signers = tuple(Signer(key) for key in sign_keys)
+        self._primary = self._signers[0]
+
+    def __len__(self):
+        return len(self._signers)
+
+    def seed(self, path=""):
+        """
+        Return a hash state seeded with the current key and `path`.
+
+        See `Signer.seed`.
+        """
+        return self._primary.seed(path)
+
+    def sign(self, path, query_string=""):
+        """
+        Return the signature made with the current key.
+
+        See `Signer.sign`.
+        """
+        return self._primary.sign(path, query_string)
+
+    def match(self, path, query_string, signature):
+        """
+        Return the index of the key that made `signature`.
+
+        Keys are tried in order and the search stops at the first match.
+        Each signature is compared in constant time.
+
+        Parameters
+        ----------
+        path : str
+            Prefixed (leading forward slash) and encoded image path.
+        query_string : str
+            Encoded query string without the signature, including its
+            leading '?'.
+        signature : str
+            Value of the 's' parameter.
+
+        Returns
+        -------
+        int or None
+            Index of the matching key, or `None` if no key matches.
+        """
+        if not signature.isascii():
+            return None
+
+        import hmac
+
+        if hmac.compare_digest(
+            self._primary.sign(path, query_string), signature
+        ):
+            return 0
+
+        # Previous keys are rarely used to sign the same path twice in a
+        # row, so their per-path states are not seeded.
+        data = (path + query_string).encode("utf-8")
+        for index in range(1, len(self._signers)):
+            state = self._signers[index].seed().copy()
+            state.update(data)
+            if hmac.compare_digest(state.hexdigest(), signature):
+                return index
+
+        return None
+
+    def verify(self, path, query_string, signature):
+        """
+        Return whether `signature` was made with any of the keys.
+
+        See `match`.
+        """
+        return self.match(path, query_string, signature) is not None
+
+
+def create_signer(sign_key):
+    """
+    Return a `Signer` for a single key or a `KeySet` for a sequence of
+    keys, or `None` if there is no key.
+
+    Parameters
+    ----------
+    sign_key : str, sequence of str or None
+
+    Returns
+    -------
+    Signer, KeySet or None
+
+    Raises
+    ------
+    ValueError
+        If a key of a sequence is empty or not a `str`.
+    """
+    if not sign_key:
+        return None
+    if isinstance(sign_key, str):
+        return Signer(sign_key)
+    _check_keys(sign_key)
+    if len(sign_key) == 1:
+        return Signer(sign_key[0])
+    return KeySet(sign_key)
+
+
+def _check_keys(sign_keys):
+    # An empty key in a sequence would accept signatures made without
+    # any key, e.g. with `[new_key, os.environ.get("OLD_KEY", "")]`.
+    for key in sign_keys:
+        if not isinstance(key, str) or not key:
+            raise ValueError(
+                "Each key of `sign_key` must be a non-empty `str`."
+            )
+
+
+def split_signed_url(url):
+    """
+    Split a signed imgix URL into its origin, path, query string and
+    signature.
+
+    The signature must be the last query parameter ('s'), as it is in the
+    URLs created by `UrlBuilder` and `UrlHelper`. Both absolute URLs and
+    paths ('/image.png?w=100&s=...') are accepted.
+
+    Parameters
+    ----------
+    url : str
+
+    Returns
+    -------
+    tuple or None
+        (origin, path, query_string, signature), where `origin` is e.g.
+        'https://demos.imgix.net' (or '' for paths) and `query_string`
+        includes its leading '?' but not the signature; or `None` if the
+        URL is not signed.
+    """
+    url = url.partition("#")[0]
+
+    # Paths may contain "://" themselves, e.g. with disabled encoding.
+    start = -1 if url.startswith("/") else url.find("://")
+    start = 0 if start == -1 else start + 3
+    query_start = url.find("?", start)
+    if query_start == -1:
+        return None
+
+    path_start = url.find("/", start, query_start)
+    if path_start == -1:
+        path_start = query_start if start else 0
+
+    query_string = url[query_start:]
+    base, separator, signature = query_string.rpartition("&s=")
+    if not separator:
+        if not query_string.startswith("?s="):
+            return None
+        base, signature = "", query_string[3:]
+
+    if "&" in signature:
+        return None
+
+    return url[:path_start], url[path_start:query_start], base, signature
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+from .encoding import encode_param_key, encode_param_value, render_query
+
+# The maximum number of query layouts kept by a `UrlTemplate`.
+TEMPLATE_LAYOUT_CACHE_SIZE = 32
+
+
+class UrlTemplate(object):
+    """
+    Render imgix URLs that share a path and most of their parameters.
+
+    The path and the unchanging parameters are encoded once, up front. For
+    each distinct set of varying parameter keys the template computes a
+    layout: the literal query string fragments that surround the varying
+    values, in sorted key order. Rendering a URL then only encodes the
+    varying values and joins them with the precomputed fragments.
+
+    For signed templates, each layout also keeps a hash state seeded with
+    the sign key, the path and the query string up to the first varying
+    value, so only the remainder of the query string is hashed per URL.
+
+    Parameters
+    ----------
+    origin : str
+        Scheme and domain, e.g. 'https://demos.imgix.net'.
+    path : str
+        Sanitized path, see `UrlBuilder._sanitize_path`.
+    static : dict
+        Encoded parameters that varying values may override.
+    base : dict
+        Encoded parameters that always take precedence, e.g. 'ixlib'.
+    signer : Signer or None
+        When provided, rendered URLs are signed.
+
+    Templates are callable; see `UrlBuilder.compile`:
+
+      >>> template = builder.compile("/bridge.png", {"fm": "webp"})
+      >>> template(w=400)
+      https://demos.imgix.net/bridge.png?fm=webp&w=400
+
+    Methods
+    -------
+    render(values)
+        Render the URL for the varying `values` dict.
+    """
+
+    def __init__(self, origin, path, static, base=None, signer=None):
+        self._origin = origin
+        self._path = path
+        self._static = static
+        self._base = base or {}
+        self._signer = signer
+        self._layouts = {}
+
+    def __call__(self, values={}, **kwargs):
+        """
+        Render the URL for the varying `values` dict and keyword arguments.
+
+        Returns
+        -------
+        str
+            imgix URL
+        """
+        if kwargs:
+            values = {**values, **kwargs}
+        return self.render(values)
+
+    def render(self, values):
+        """
+        Render the URL for the varying `values` dict.
+
+        Parameters
+        ----------
+        values : dict
+            Unencoded parameters. They override parameters with the same
+            key that the template was created with.
+
+        Returns
+        -------
+        str
+            imgix URL
+        """
+        layout = self._layouts.get(tuple(values))
+        if layout is None:
+            layout = self._layout(tuple(values))
+
+        if layout is False:
+            return self._render_merged(values)
+        if layout.__class__ is str:
+            return layout
+
+        segments, slots, state = layout
+        parts = []
+        for i, (key, encoded_key) in enumerate(slots):
+            parts.append(encode_param_value(encoded_key, values[key]))
+            parts.append(segments[i + 1])
+
+        tail = "".join(parts)
+        query_string = segments[0] + tail
+
+        if state is not None:
+            state = state.copy()
+            state.update(tail.encode("utf-8"))
+            query_string += "&s=" + state.hexdigest()
+
+        return self._origin + self._path + query_string
+
+    def _layout(self, keys):
+        if len(self._layouts) >= TEMPLATE_LAYOUT_CACHE_SIZE:
+            self._layouts.clear()
+
+        encoded_keys = [encode_param_key(k) for k in keys]
+        slots = [
+            (k, ek) for k, ek in zip(keys, encoded_keys)
+            if ek not in self._base
+        ]
+
+        # Distinct keys that encode to the same key cannot be laid out;
+        # merge those per URL instead.
+        if len(set(encoded_keys)) != len(keys):
+            self._layouts[keys] = False
+            return False
+
+        # Without any varying slot every URL is the same.
+        if not slots:
+            url = self._render_merged({})
+            self._layouts[keys] = url
+            return url
+
+        slot_keys = {ek for _, ek in slots}
+        all_keys = set(self._static) | set(self._base) | slot_keys
+
+        segments = []
+        literal = ""
+        delimiter = "?"
+        for k in sorted(all_keys):
+            literal += delimiter + k + "="
+            delimiter = "&"
+            if k in slot_keys:
+                segments.append(literal)
+                literal = ""
+            elif k in self._base:
+                literal += self._base[k]
+            else:
+                literal += self._static[k]
+        segments.append(literal)
+
+        # Slots are filled in sorted key order.
+        slots.sort(key=lambda slot: slot[1])
+
+        state = None
+        if self._signer is not None:
+            state = self._signer.seed(self._path).copy()
+            state.update(segments[0].encode("utf-8"))
+
+        layout = (tuple(segments), tuple(slots), state)
+        self._layouts[keys] = layout
+        return layout
+
+    def _render_merged(self, values):
+        encoded = dict(self._static)
+        for k, v in values.items():
+            key = encode_param_key(k)
+            encoded[key] = encode_param_value(key, v)
+        encoded.update(self._base)
+
+        query_string = render_query(encoded)
+        if self._signer is not None:
+            signature = self._signer.sign(self._path, query_string)
+            query_string += ("&s=" if query_string else "?s=") + signature
+
+        return self._origin + self._path + query_string
@@ -1,14 +1,39 @@
 # -*- coding: utf-8 -*-
 import math
-import re
-import hashlib
 
-from ._version import __version__
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import islice
+from time import perf_counter
+from types import MappingProxyType
 
 
-from base64 import urlsafe_b64encode
 from urllib.parse import quote_plus, quote
+from ._version import __version__
+from .cache import LRUCache
+from .config import get_config
+from .encoding import encode_params, render_query
+from .metrics import (
+    CACHE_BACKEND_HITS,
+    CACHE_BACKEND_MISSES,
+    CREATE_SRCSET_CALLS,
+    CREATE_URL_CALLS,
+    CREATE_URLS_CALLS,
+    ITER_SRCSET_CALLS,
+    PATH_CACHE_HITS,
+    PATH_CACHE_MISSES,
+    SRCSET_CACHE_HITS,
+    SRCSET_CACHE_MISSES,
+    STAGE_PARAMS,
+    STAGE_SANITIZE,
+    STAGE_SIGN,
+    STAGE_SRCSET,
+)
+from .params import ImgixParams
+from .signing import split_signed_url
+from .template import UrlTemplate
 from .validators import (
+    is_valid_domain,
     validate_device_pixel_ratios,
     validate_min_max_tol,
     validate_variable_qualities,
@@ -20,7 +45,10 @@ from .constants import IMAGE_MAX_WIDTH as MAX_WIDTH
 from .constants import IMAGE_MIN_WIDTH as MIN_WIDTH
 from .constants import SRCSET_WIDTH_TOLERANCE as TOLERANCE
 from .constants import SRCSET_DPR_TARGET_RATIOS as TARGET_RATIOS
-from .constants import DOMAIN_PATTERN, SRCSET_TARGET_WIDTHS as TARGET_WIDTHS
+from .constants import SRCSET_TARGET_WIDTHS as TARGET_WIDTHS
+
+# The default params of the builders without any, shared by all of them.
+_NO_PARAMS = MappingProxyType({})
 
 
 class UrlBuilder(object):
@@ -36,13 +64,41 @@ class UrlBuilder(object):
         Domain to use while creating imgix URLs.
     use_https : bool
         If `True`, create HTTPS imgix image URLs. (default `True`)
-    sign_key : str or None
+    sign_key : str, list of str or None
         When provided, this key will be used to sign the generated image URLs.
         You can read more about URL signing on our docs:
         https://docs.imgix.com/setup/securing-images
+        During key rotation, pass a list of keys: URLs are signed with the
+        first key and `verify_url` accepts signatures made with any key.
     include_library_param : bool
         If `True`, each created URL is suffixed with 'ixlib' parameter
         indicating the library used for generating the URLs. (default `True`)
+    path_cache_size : int
+        When greater than zero, up to this many sanitized paths are kept
+        in a least-recently-used cache shared by all the URLs created by
+        this builder. (default 0, disabled)
+    metrics : MetricsSink or None
+        When provided, calls, path cache hits and misses and the time
+        spent sanitizing paths, building params, signing and assembling
+        srcsets are reported to this sink, see `imgix.metrics`.
+        (default None, disabled)
+    default_params : dict
+        Parameters added to every URL created by this builder, e.g.
+        {'auto': 'format,compress'}. They are encoded once, up front;
+        parameters passed to each call take precedence. (default {})
+    srcset_cache_size : int
+        When greater than zero, up to this many srcset attributes created
+        by `create_srcset` are kept in a least-recently-used cache, keyed
+        by the path, params, options and target widths of the call.
+        (default 0, disabled)
+    srcset_cache_ttl : float or None
+        When provided, cached srcset attributes expire after this many
+        seconds. (default None, never)
+    cache_backend : CacheBackend or None
+        When provided, the URLs and srcset attributes created by this
+        builder are stored in, and first looked up from, this backend,
+        e.g. to share them between processes, see `imgix.backends`.
+        (default None, disabled)
 
     Methods
     -------
@@ -51,24 +107,133 @@ class UrlBuilder(object):
         domain name accepted by imgix
     create_url(path, params=None)
         Create URL with the supplied path and `params` parameters dict.
+    with_params(params=None)
+        Create a builder whose default params are updated with `params`.
+    create_urls(items, params=None, chunk_size=1000)
+        Lazily create URLs for an iterable of paths or (path, params)
+        pairs.
+    compile(path, params=None)
+        Create a reusable `UrlTemplate` for the supplied path and
+        `params` parameters dict.
     create_srcset(path, params=None)
         Create srcset attribute value with the supplied path and
         `params` parameters dict.
         Will generate a fixed-width DPR srcset if a width OR height and aspect
         ratio are passed in as parameters. Otherwise will generate a srcset
         with width-descriptor pairs.
+    create_srcsets(items, params=None)
+        Create the srcset attributes of a list of paths or (path, params)
+        pairs.
+    iter_srcset(path, params=None)
+        Lazily generate the (url, descriptor) image candidates of the
+        srcset attribute created by `create_srcset`.
+    verify_url(url)
+        Return whether the signature of a URL is valid for the sign key.
+    verify_urls(urls)
+        Lazily verify the signatures of an iterable of URLs.
+    path_cache_info()
+        Return the path cache statistics, or `None` if it is disabled.
+    srcset_cache_info()
+        Return the srcset cache statistics, or `None` if it is disabled.
+    invalidate_srcsets(path=None)
+        Remove the cached srcset attributes of `path`, or all of them.
     """
 
+    # Builders are kept by the thousand, e.g. one per tenant: they hold no
+    # `__dict__` and share their interned `Config` with every builder of
+    # the same domain, scheme, sign key and library parameter setting.
+    __slots__ = (
+        "_config",
+        "_signer",
+        "_path_cache_size",
+        "_path_cache",
+        "_metrics",
+        "_default_params",
+        "_defaults",
+        "_default_query",
+        "_srcset_cache_size",
+        "_srcset_cache_ttl",
+        "_srcset_cache",
+        "_cache_backend",
+        "_cache_namespace",
+    )
+
     def __init__(
-        self, domain, use_https=True, sign_key=None, include_library_param=True
+        self,
+        domain,
+        use_https=True,
+        sign_key=None,
+        include_library_param=True,
+        path_cache_size=0,
+        metrics=None,
+        default_params={},
+        srcset_cache_size=0,
+        srcset_cache_ttl=None,
+        cache_backend=None,
     ):
 
         self.validate_domain(domain)
 
-        self._domain = domain
-        self._sign_key = sign_key
-        self._use_https = use_https
-        self._include_library_param = include_library_param
+        self._config = get_config(
+            domain,
+            "https" if use_https else "http",
+            sign_key,
+            include_library_param,
+        )
+        self._signer = self._config.signer
+        self._path_cache_size = path_cache_size
+        self._path_cache = (
+            LRUCache(path_cache_size) if path_cache_size else None
+        )
+        self._metrics = metrics
+        self._cache_backend = cache_backend
+        if default_params:
+            self._set_default_params(
+                dict(default_params), encode_params(default_params)
+            )
+        else:
+            self._set_default_params(_NO_PARAMS, _NO_PARAMS)
+        self._set_srcset_cache(srcset_cache_size, srcset_cache_ttl)
+
+    def _set_default_params(self, default_params, defaults):
+        # The default params, as passed and encoded, and the query string
+        # of the URLs created without per-call params.
+        self._default_params = default_params
+        self._defaults = defaults
+        if defaults:
+            self._default_query = render_query(
+                {**defaults, **self._base_params()}
+            )
+        else:
+            # Shared by all the builders with the same configuration.
+            self._default_query = self._config.default_query
+        # Computed on first use, see `_backend_key`.
+        self._cache_namespace = None
+
+    def _set_srcset_cache(self, size, ttl):
+        self._srcset_cache_size = size
+        self._srcset_cache_ttl = ttl
+        self._srcset_cache = LRUCache(size, ttl) if size else None
+
+    def __reduce__(self):
+        # Builders are pickled as their configuration, e.g. to be shipped
+        # to worker processes; caches are rebuilt empty on unpickling and
+        # metrics sinks and cache backends are not carried over.
+        config = self._config
+        return (
+            self.__class__,
+            (
+                config.domain,
+                config.scheme == "https",
+                config.sign_key,
+                config.include_library_param,
+                self._path_cache_size,
+                None,
+                dict(self._default_params),
+                self._srcset_cache_size,
+                self._srcset_cache_ttl,
+            ),
+        )
 
     def validate_domain(self, domain):
         """
@@ -90,9 +255,51 @@ class UrlBuilder(object):
             + '"example.imgix.net".'
         )
 
-        if re.match(DOMAIN_PATTERN, domain) is None:
+        if not is_valid_domain(domain):
             raise ValueError(err_str)
 
+    def with_params(self, params={}, **kwargs):
+        """
+        Create a builder whose default params are this builder's default
+        params updated with `params` and keyword arguments.
+
+        The new builder shares the configuration, path cache and metrics
+        sink and cache backend of this builder; only `params` are encoded.
+        Its srcset cache, if enabled, starts empty:
+
+          >>> thumbnails = builder.with_params(fit="crop", w=200, h=200)
+          >>> thumbnails.create_url("/bridge.png")
+          https://demos.imgix.net/bridge.png?fit=crop&h=200&w=200
+
+        Parameters
+        ----------
+        params : dict
+            Default params to add or override. (default None)
+
+        Returns
+        -------
+        UrlBuilder
+        """
+        if kwargs:
+            params = {**params, **kwargs}
+
+        builder = self.__class__.__new__(self.__class__)
+        builder._config = self._config
+        builder._signer = self._signer
+        builder._path_cache_size = self._path_cache_size
+        builder._path_cache = self._path_cache
+        builder._metrics = self._metrics
+        builder._cache_backend = self._cache_backend
+        builder._set_default_params(
+            {**self._default_params, **params},
+            {**self._defaults, **encode_params(params)},
+        )
+        # Cached srcsets depend on the default params: do not share them.
+        builder._set_srcset_cache(
+            self._srcset_cache_size, self._srcset_cache_ttl
+        )
+        return builder
+
     def create_url(self, path="", params={}, options={}):
         """
         Create URL with supplied path, `params` parameters dict
@@ -115,24 +322,347 @@ class UrlBuilder(object):
         str
             imgix URL
         """
+        if self._cache_backend is not None:
+            return self._create_cached_url(path, params, options)
+
+        if self._metrics is not None:
+            return self._create_url_instrumented(path, params, options)
+
+        disable_path_encoding = options.get("disable_path_encoding", False)
+        sanitized_path = self._sanitize_path(
+            path, options={"disable_path_encoding": disable_path_encoding}
+        )
+
+        query_string = self._build_params(params)
+
+        if self._signer:
+            query_string = self._sign_url(sanitized_path, query_string)
+
+        return self._config.origin + sanitized_path + query_string
+
+    def _create_cached_url(self, path, params, options):
+        # `create_url` looking the URL up in the cache backend first.
+        if self._metrics is not None:
+            self._metrics.increment(CREATE_URL_CALLS)
+        key = self._backend_key(
+            ("url", path, params, _path_encoding_option(options))
+        )
+        return self._fetch_or_create(
+            [key],
+            lambda missing: self._iter_urls(
+                iter([(path, params)]), {}, options, 1
+            ),
+        )[0]
+
+    def _create_url_instrumented(self, path, params, options):
+        # `create_url` reporting its calls and the time of each stage.
+        metrics = self._metrics
+        metrics.increment(CREATE_URL_CALLS)
+
+        t0 = perf_counter()
         disable_path_encoding = options.get("disable_path_encoding", False)
         sanitized_path = self._sanitize_path(
             path, options={"disable_path_encoding": disable_path_encoding}
         )
+        t1 = perf_counter()
+        metrics.timing(STAGE_SANITIZE, t1 - t0)
 
         query_string = self._build_params(params)
+        t2 = perf_counter()
+        metrics.timing(STAGE_PARAMS, t2 - t1)
 
-        if self._sign_key:
+        if self._signer:
             query_string = self._sign_url(sanitized_path, query_string)
+            metrics.timing(STAGE_SIGN, perf_counter() - t2)
 
-        scheme = "https" if self._use_https else "http"
+        return self._config.origin + sanitized_path + query_string
+
+    def create_urls(self, items, params={}, options={}, chunk_size=1000):
+        """
+        Lazily create URLs for an iterable of paths or (path, params) pairs.
+
+        This is equivalent to calling `create_url` for each item, but the
+        work shared between items is amortized: the query string is
+        encoded once for the shared `params` and once per distinct set of
+        per-item params within a chunk, and parameter keys are quoted once.
+
+        Parameters
+        ----------
+        items : iterable
+            Paths (str) or (path, params) tuples. Per-item params take
+            precedence over the shared `params`.
+        params : dict
+            Dictionary specifying URL parameters shared by all the items.
+            (default None)
+        options : dict
+            Dictionary specifying URL options such as disabled_path_encoding.
+            (default None)
+        chunk_size : int
+            Number of items consumed from `items` at a time. Memory use is
+            bounded by the chunk size, not by the number of items.
+            (default 1000)
 
-        return scheme + "://" + self._domain + sanitized_path + query_string
+        Yields
+        ------
+        str
+            imgix URL for each item, in input order.
+        """
+        if not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("`chunk_size` must be a positive `int`")
+
+        if self._metrics is not None:
+            self._metrics.increment(CREATE_URLS_CALLS)
+        if self._cache_backend is not None:
+            return self._iter_cached_urls(
+                iter(items), params, options, chunk_size
+            )
+        return self._iter_urls(iter(items), params, options, chunk_size)
+
+    def _iter_cached_urls(self, items, params, options, chunk_size):
+        # `_iter_urls` looking up each chunk with one backend call.
+        disable_path_encoding = _path_encoding_option(options)
+
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                return
+
+            keys = []
+            for item in chunk:
+                if isinstance(item, str):
+                    path, item_params = item, params
+                else:
+                    path, item_params = item
+                    if params:
+                        item_params = {**params, **item_params}
+                keys.append(
+                    self._backend_key(
+                        ("url", path, item_params, disable_path_encoding)
+                    )
+                )
+
+            yield from self._fetch_or_create(
+                keys,
+                lambda missing: self._iter_urls(
+                    iter([chunk[i] for i in missing]),
+                    params,
+                    options,
+                    len(missing),
+                ),
+            )
+
+    def _iter_urls(self, items, params, options, chunk_size):
+        path_options = {
+            "disable_path_encoding": options.get(
+                "disable_path_encoding", False
+            )
+        }
+        origin = self._config.origin
+        shared_query_string = self._build_params(params)
+        signer = self._signer
+
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                return
+
+            # Encoded query strings of the per-item params in this chunk.
+            query_strings = {}
+
+            for item in chunk:
+                if isinstance(item, str):
+                    path, query_string = item, shared_query_string
+                else:
+                    path, item_params = item
+                    if item_params.__class__ is ImgixParams:
+                        key = item_params
+                    else:
+                        key = _freeze_params(item_params)
+                    query_string = query_strings.get(key)
+                    if query_string is None:
+                        query_string = self._build_params(
+                            {**params, **item_params} if params
+                            else item_params
+                        )
+                        query_strings[key] = query_string
+
+                sanitized_path = self._sanitize_path(path, path_options)
+                if signer is not None:
+                    yield origin + sanitized_path + self._sign_url(
+                        sanitized_path, query_string
+                    )
+                else:
+                    yield origin + sanitized_path + query_string
+
+    def compile(self, path="", params={}, options={}):
+        """
+        Create a reusable URL template with supplied path, `params`
+        parameters dict and optional `options` dict.
+
+        The path and params are sanitized and encoded once. The returned
+        template is called with only the params that vary between URLs,
+        which take precedence over `params`:
+
+          >>> template = builder.compile("/bridge.png", {"fm": "webp"})
+          >>> template(w=400)
+          https://demos.imgix.net/bridge.png?fm=webp&w=400
+          >>> template({"w": 800, "h": 600})
+          https://demos.imgix.net/bridge.png?fm=webp&h=600&w=800
+
+        Calling the template produces the same URL as calling `create_url`
+        with the merged params.
+
+        Parameters
+        ----------
+        path : str
+        params : dict
+            Dictionary specifying URL parameters shared by all the URLs
+            created from the template. (default None)
+        options : dict
+            Dictionary specifying URL options such as disabled_path_encoding.
+            (default None)
+
+        Returns
+        -------
+        UrlTemplate
+            Callable accepting a dict and/or keyword arguments of params.
+        """
+        return self._create_template(path, params, options)
+
+    def verify_url(self, url):
+        """
+        Return whether the signature of `url` is valid for the sign key.
+
+        The signature is recomputed from the path and query string exactly
+        as they appear in `url`, the same way `create_url` computes it, and
+        compared in constant time. The 's' parameter must be the last
+        query parameter. If the builder has several sign keys, a signature
+        made with any of them is valid.
+
+        Parameters
+        ----------
+        url : str
+            Signed imgix URL, or its path and query string only.
+
+        Returns
+        -------
+        bool
+            `False` if `url` is not signed or the signature is invalid.
+
+        Raises
+        ------
+        ValueError
+            If the builder was created without a `sign_key`.
+        """
+        if self._signer is None:
+            raise ValueError("Verifying URLs requires a `sign_key`.")
+
+        return self._verify(url)
+
+    def verify_urls(self, urls):
+        """
+        Lazily verify the signatures of `urls`, see `verify_url`.
+
+        Parameters
+        ----------
+        urls : iterable
+            Signed imgix URLs, or their paths and query strings only.
+
+        Yields
+        ------
+        bool
+            Whether the signature of each URL is valid, in input order.
+
+        Raises
+        ------
+        ValueError
+            If the builder was created without a `sign_key`.
+        """
+        if self._signer is None:
+            raise ValueError("Verifying URLs requires a `sign_key`.")
+
+        return map(self._verify, urls)
+
+    def _verify(self, url):
+        parts = split_signed_url(url)
+        if parts is None:
+            return False
+
+        _, path, query_string, signature = parts
+        return self._signer.verify(path, query_string, signature)
+
+    def path_cache_info(self):
+        """
+        Return the path cache statistics.
+
+        Returns
+        -------
+        CacheInfo or None
+            Hits, misses, evictions and sizes of the path cache, or `None`
+            if the builder was created without a `path_cache_size`.
+        """
+        if self._path_cache is None:
+            return None
+        return self._path_cache.cache_info()
+
+    def srcset_cache_info(self):
+        """
+        Return the srcset cache statistics.
+
+        Returns
+        -------
+        CacheInfo or None
+            Hits, misses, evictions and sizes of the srcset cache, or
+            `None` if the builder was created without a
+            `srcset_cache_size`.
+        """
+        if self._srcset_cache is None:
+            return None
+        return self._srcset_cache.cache_info()
+
+    def invalidate_srcsets(self, path=None):
+        """
+        Remove cached srcset attributes, e.g. after an image was replaced.
+
+        The statistics of the cache are kept.
+
+        Parameters
+        ----------
+        path : str or None
+            Remove the srcset attributes created for this path, as passed
+            to `create_srcset`, or all of them if `None`. (default None)
+
+        Returns
+        -------
+        int
+            Number of srcset attributes removed.
+        """
+        if self._srcset_cache is None:
+            return 0
+        if path is None:
+            return self._srcset_cache.discard_if(lambda key: True)
+        return self._srcset_cache.discard_if(lambda key: key[0] == path)
 
     def _sanitize_path(self, path, options={}):
         if not path:
             return ""
 
+        cache = self._path_cache
+        if cache is None:
+            return self._encode_path(path, options)
+
+        key = (path, bool(options["disable_path_encoding"]))
+        sanitized = cache.get(key)
+        if sanitized is None:
+            sanitized = self._encode_path(path, options)
+            cache.set(key, sanitized)
+            if self._metrics is not None:
+                self._metrics.increment(PATH_CACHE_MISSES)
+        elif self._metrics is not None:
+            self._metrics.increment(PATH_CACHE_HITS)
+        return sanitized
+
+    def _encode_path(self, path, options):
         _path = path[:]
         # If the path is prefixed with a forward slash,
         # remove it.
@@ -155,38 +685,34 @@ class UrlBuilder(object):
         return quote_plus(path)
 
     def _build_params(self, params):
-        # Stringify all param values.
-        _params = {quote(k): str(v) for k, v in params.items()}
-
-        if self._include_library_param:
-            _params["ixlib"] = "python-" + __version__
-
-        for k, v in _params.items():
-            # Base64 encode any params whose keys end with '64'.
-            # The encoding function uses '=' as padding so we replace
-            # those with ''.
-            if k.endswith("64"):
-                # First we call encode on v to get a bytes-like object,
-                # then after replacing any padding characters that may
-                # be present, we call decode to get back a string object.
-                _params[k] = (
-                    urlsafe_b64encode(v.encode("utf-8"))
-                    .replace(b"=", b"")
-                    .decode("utf-8")
-                )
-            else:
-                # quote_plus will encode SPACE (' ') as PLUS (+). If a
-                # PLUS (+) is present, e.g. "Futura+Condensed Medium",
-                # it will be encoded as "Futura%2BCondensed+Medium".
-                _params[k] = quote_plus(v).replace("+", "%20")
-
-        query_string = [f"{k}={_params[k]}" for k in sorted(_params.keys())]
-        delimeter = "?" if query_string else ""
-        return delimeter + "&".join(query_string)
+        if not params:
+            return self._default_query
+        if params.__class__ is ImgixParams and not self._defaults:
+            # Already encoded and sorted.
+            return params._query_with(self._base_params())
+        return render_query(self._encode_params(params))
+
+    def _encode_params(self, params):
+        # Stringify and encode the param values, on top of the encoded
+        # default params.
+        if params.__class__ is ImgixParams:
+            # Already encoded; the encoded params are shared and copied.
+            encoded = {**self._defaults, **params._encoded}
+        else:
+            encoded = encode_params(params)
+            if self._defaults:
+                encoded = {**self._defaults, **encoded}
+        encoded.update(self._base_params())
+        return encoded
+
+    def _base_params(self):
+        # Encoded params that are appended to every URL and cannot be
+        # overridden by the caller. Shared by all the builders with the
+        # same configuration; must not be modified.
+        return self._config.base_params
 
     def _sign_url(self, prefixed_path, query_string):
-        signature_base = self._sign_key + prefixed_path + query_string
-        signature = hashlib.md5(signature_base.encode("utf-8")).hexdigest()
+        signature = self._signer.sign(prefixed_path, query_string)
         delimeter = "&s=" if query_string else "?s="
         return query_string + delimeter + signature
 
@@ -240,15 +766,265 @@ class UrlBuilder(object):
             Tolerable amount of width value variation, TOLERANCE by default.
         widths: list, optional
             List of target widths, `TARGET_WIDTHS` by default.
+        disable_variable_quality : bool, optional
+            Do not vary the quality of DPR srcsets, `False` by default.
+
+        If the builder has a srcset cache, the attribute is cached, and
+        returned by later calls with equal arguments.
+
         Returns
         -------
         str
             Srcset attribute string.
         """
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.increment(CREATE_SRCSET_CALLS)
+            t0 = perf_counter()
+
+        if self._srcset_cache is None and self._cache_backend is None:
+            srcset = self._create_srcset(path, params, options, kwargs)
+        else:
+            srcset = self._create_cached_srcsets(
+                [(path, params)], options, kwargs
+            )[0]
+
+        if metrics is not None:
+            metrics.timing(STAGE_SRCSET, perf_counter() - t0)
+        return srcset
+
+    def create_srcsets(self, items, params={}, options={}, **kwargs):
+        """
+        Create the srcset attributes of several images at once.
+
+        This is equivalent to calling `create_srcset` for each item, but
+        with a cache backend, all the srcsets are looked up with a single
+        `get_many` call, and the missing ones stored with a single
+        `set_many` call, e.g. once per page rather than once per image.
+
+        Parameters
+        ----------
+        items : iterable
+            Paths (str) or (path, params) tuples. Per-item params take
+            precedence over the shared `params`.
+        params : dict
+            Parameters shared by all the items, see `create_srcset`.
+            (default None)
+        options : dict
+            See `create_srcset`. (default None)
+        **kwargs
+            `widths`, `start`, `stop`, `tol` and
+            `disable_variable_quality`, see `create_srcset`.
+
+        Returns
+        -------
+        list of str
+            Srcset attribute strings, in input order.
+        """
+        pairs = []
+        for item in items:
+            if isinstance(item, str):
+                pairs.append((item, params))
+            else:
+                path, item_params = item
+                if params:
+                    item_params = {**params, **item_params}
+                pairs.append((path, item_params))
+
+        if self._srcset_cache is None and self._cache_backend is None:
+            return [
+                self.create_srcset(path, item_params, options, **kwargs)
+                for path, item_params in pairs
+            ]
+
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.increment(CREATE_SRCSET_CALLS, len(pairs))
+            t0 = perf_counter()
+
+        srcsets = self._create_cached_srcsets(pairs, options, kwargs)
+
+        if metrics is not None:
+            metrics.timing(STAGE_SRCSET, perf_counter() - t0)
+        return srcsets
+
+    def _create_srcset(self, path, params, options, kwargs):
+        candidates = self._srcset_candidates(path, params, options, kwargs)
+        return ",\n".join([url + " " + d for url, d in candidates])
+
+    def _create_cached_srcsets(self, pairs, options, kwargs):
+        # Look the srcsets of the (path, params) pairs up in the srcset
+        # cache, then in the cache backend, and create the others.
+        metrics = self._metrics
+        srcsets = [None] * len(pairs)
+        cache = self._srcset_cache
+        cache_keys = None
+
+        if cache is not None:
+            cache_keys = []
+            for i, (path, params) in enumerate(pairs):
+                key = _srcset_cache_key(path, params, options, kwargs)
+                cache_keys.append(key)
+                if key is not None:
+                    srcsets[i] = cache.get(key)
+                if metrics is not None:
+                    metrics.increment(
+                        SRCSET_CACHE_MISSES
+                        if srcsets[i] is None
+                        else SRCSET_CACHE_HITS
+                    )
+
+        missing = [i for i, srcset in enumerate(srcsets) if srcset is None]
+        if not missing:
+            return srcsets
+
+        def create(indexes):
+            return [
+                self._create_srcset(
+                    pairs[missing[i]][0], pairs[missing[i]][1], options, kwargs
+                )
+                for i in indexes
+            ]
+
+        if self._cache_backend is None:
+            created = create(range(len(missing)))
+        else:
+            # Passed unchanged: a tuple of widths, which fails validation,
+            # must not share the key of a list.
+            rest = (
+                options,
+                kwargs.get("widths"),
+                kwargs.get("start"),
+                kwargs.get("stop"),
+                kwargs.get("tol"),
+                bool(kwargs.get("disable_variable_quality", False)),
+            )
+            created = self._fetch_or_create(
+                [
+                    self._backend_key(("srcset",) + pairs[i] + rest)
+                    for i in missing
+                ],
+                create,
+            )
+
+        for i, srcset in zip(missing, created):
+            srcsets[i] = srcset
+            if cache_keys is not None and cache_keys[i] is not None:
+                cache.set(cache_keys[i], srcset)
+        return srcsets
+
+    def _fetch_or_create(self, keys, create):
+        # Return the values of `keys` from the cache backend. The missing
+        # values, and those of `None` keys, are created by
+        # `create(indexes)`, which returns an iterable of the values of
+        # `keys[i]` for `i` in `indexes`, then stored in one call.
+        backend = self._cache_backend
+        cacheable = [key for key in keys if key is not None]
+        found = backend.get_many(cacheable) if cacheable else {}
+
+        values = [found.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+
+        if self._metrics is not None:
+            self._metrics.increment(CACHE_BACKEND_HITS, len(found))
+            self._metrics.increment(CACHE_BACKEND_MISSES, len(missing))
+
+        if missing:
+            created = {}
+            for i, value in zip(missing, create(missing)):
+                values[i] = value
+                if keys[i] is not None:
+                    created[keys[i]] = value
+            if created:
+                backend.set_many(created)
+        return values
+
+    def _backend_key(self, args):
+        # Key of a result in the cache backend: a digest of `args` in the
+        # namespace of this builder, or `None` if `args` cannot be
+        # represented the same way in every process.
+        try:
+            # The order of params and options does not matter.
+            canonical = "(%s)" % ",".join(
+                [_canonical(arg, sort_items=True) for arg in args]
+            )
+        except TypeError:
+            return None
+
+        from hashlib import md5
+
+        namespace = self._cache_namespace
+        if namespace is None:
+            # The builder settings that change the created URLs; the
+            # sign key is represented by a signature, not by its value.
+            config = self._config
+            signature = self._signer.sign("/") if self._signer else ""
+            namespace = md5(
+                "\n".join(
+                    [__version__, config.origin, self._default_query,
+                     signature]
+                ).encode("utf-8")
+            ).hexdigest()[:16]
+            self._cache_namespace = namespace
+
+        digest = md5(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+        return "imgix:" + namespace + ":" + digest
+
+    def iter_srcset(self, path, params={}, options={}, joined=False, **kwargs):
+        """
+        Lazily generate the image candidates of a srcset attribute.
+
+        This function accepts the same arguments as `create_srcset`, but
+        instead of returning the whole srcset attribute it yields each
+        image candidate as soon as it is created, e.g. to write them
+        straight to a response buffer.
+
+        Arguments are validated when `iter_srcset` is called, not when
+        the first candidate is generated.
+
+        Parameters
+        ----------
+        path : str
+            Path to the image file, e.g. 'image/path.png'.
+        params : dict, optional
+            See `create_srcset`, {} by default.
+        options: dict, optional
+            See `create_srcset`, {} by default.
+        joined : bool, optional
+            If `True`, yield image candidate strings with their separators
+            rather than (url, descriptor) tuples. `False` by default.
+        start : int, optional
+            Starting minimum width value, MIN_WIDTH by default.
+        stop : int, optional
+            Stopping maximum width value, MAX_WIDTH by default.
+        tol : float, optional
+            Tolerable amount of width value variation, TOLERANCE by default.
+        widths: list, optional
+            List of target widths, `TARGET_WIDTHS` by default.
+
+        Yields
+        ------
+        tuple or str
+            (url, descriptor) tuples, e.g.
+            ('https://example.test.com/image/path.png?w=100', '100w'), or,
+            if `joined` is `True`, image candidate strings which
+            concatenate to the result of `create_srcset`, e.g.
+            'https://example.test.com/image/path.png?w=100 100w' followed
+            by ',\nhttps://example.test.com/image/path.png?w=116 116w'.
+        """
+        candidates = self._srcset_candidates(path, params, options, kwargs)
+        if self._metrics is not None:
+            self._metrics.increment(ITER_SRCSET_CALLS)
+            candidates = _timed_candidates(candidates, self._metrics)
+        if joined:
+            return _join_candidates(candidates)
+        return candidates
+
+    def _srcset_candidates(self, path, params, options, kwargs):
         widths_list = kwargs.get("widths", None)
         if widths_list:
             validate_widths(widths_list)
-            return self._build_srcset_pairs(
+            return self._iter_srcset_pairs(
                 path, params, options, targets=widths_list
             )
 
@@ -269,42 +1045,56 @@ class UrlBuilder(object):
         if tol is None:
             tol = TOLERANCE
 
-        validate_min_max_tol(start, stop, tol)
+        # Validated and computed once per (start, stop, tol).
+        targets = _target_widths(start, stop, tol)
 
-        targets = target_widths(start=start, stop=stop, tol=tol)
-
-        if "w" in params or "h" in params:
+        # Default params count as if they were passed.
+        if "w" in params or "h" in params or (
+            "w" in self._default_params or "h" in self._default_params
+        ):
             disable_variable_quality = kwargs.get(
                 "disable_variable_quality", False
             )
-            return self._build_srcset_DPR(
+            return self._iter_srcset_DPR(
                 path,
                 params,
                 options,
                 disable_variable_quality=disable_variable_quality,
             )
         else:
-            return self._build_srcset_pairs(path, params, options, targets)
+            return self._iter_srcset_pairs(path, params, options, targets)
 
-    def _build_srcset_pairs(
+    def _create_template(self, path, params, options):
+        disable_path_encoding = options.get("disable_path_encoding", False)
+        sanitized_path = self._sanitize_path(
+            path, options={"disable_path_encoding": disable_path_encoding}
+        )
+        if params.__class__ is ImgixParams:
+            # Templates do not modify their static params.
+            static = params._encoded
+        else:
+            static = encode_params(params)
+        if self._defaults:
+            static = {**self._defaults, **static}
+        return UrlTemplate(
+            self._config.origin,
+            sanitized_path,
+            static,
+            self._base_params(),
+            self._signer,
+        )
+
+    def _iter_srcset_pairs(
         self, path, params, options, targets=TARGET_WIDTHS
     ):
-        # prevents mutating the params dict
-        srcset_params = dict(params)
-        srcset_entries = []
+        # The path and params are encoded once; only the width is
+        # rendered per candidate.
+        template = self._create_template(path, params, options)
 
         for w in targets:
-            srcset_params["w"] = w
-            srcset_entries.append(
-                self.create_url(path, srcset_params, options)
-                + " "
-                + str(w)
-                + "w"
-            )
-
-        return ",\n".join(srcset_entries)
+            yield template.render({"w": w}), str(w) + "w"
 
-    def _build_srcset_DPR(
+    def _iter_srcset_DPR(
         self,
         path,
         params,
@@ -324,11 +1114,6 @@ class UrlBuilder(object):
         # Note: if `q` is passed with `params`, then it will be
         # present in the URL's query params whether or not
         # `disabled_variable_quality` is `True` or `False`.
-
-        # prevents mutating the params dict
-        srcset_params = dict(params)
-        srcset_entries = []
-
         variable_qualities = options.get("variable_qualities", {})
         if variable_qualities:
             validate_variable_qualities(variable_qualities)
@@ -341,26 +1126,147 @@ class UrlBuilder(object):
             validate_device_pixel_ratios(device_pixel_ratios)
             targets = device_pixel_ratios
 
+        # The options are validated before the first candidate is
+        # requested; the candidates themselves are created lazily.
+        return self._iter_dpr_candidates(
+            path,
+            params,
+            options,
+            targets,
+            qualities,
+            disable_variable_quality,
+        )
+
+    def _iter_dpr_candidates(
+        self,
+        path,
+        params,
+        options,
+        targets,
+        qualities,
+        disable_variable_quality,
+    ):
+        # The path and params are encoded once; only the values that
+        # vary between candidates are rendered per candidate.
+        template = self._create_template(path, params, options)
+        srcset_values = {}
+        explicit_quality = params.get("q", self._default_params.get("q"))
+
         for dpr in targets:
-            srcset_params["dpr"] = dpr
+            srcset_values["dpr"] = dpr
 
             if not disable_variable_quality:
                 quality = (
-                    params.get("q", None)
+                    explicit_quality
                     or qualities.get("dpr")
                     or qualities.get(math.floor(dpr))
                 )
                 if quality:
-                    srcset_params["q"] = quality
-
-            srcset_entries.append(
-                self.create_url(path, srcset_params, options)
-                + " "
-                + str(dpr)
-                + "x"
-            )
-
-        return ",\n".join(srcset_entries)
+                    srcset_values["q"] = quality
+
+            yield template.render(srcset_values), str(dpr) + "x"
+
+
+def _timed_candidates(candidates, metrics):
+    # Report the time spent creating the candidates, excluding the time
+    # spent by the consumer in between.
+    elapsed = 0.0
+    t0 = perf_counter()
+    for candidate in candidates:
+        elapsed += perf_counter() - t0
+        yield candidate
+        t0 = perf_counter()
+    metrics.timing(STAGE_SRCSET, elapsed + perf_counter() - t0)
+
+
+def _join_candidates(candidates):
+    # Yield image candidate strings prefixed with their separator, so
+    # that they concatenate to a srcset attribute.
+    separator = ""
+    for url, descriptor in candidates:
+        yield separator + url + " " + descriptor
+        separator = ",\n"
+
+
+def _freeze_params(params):
+    # Return a hashable representation of `params`: the strings they are
+    # encoded from. Equal values, even of the same type, may be rendered
+    # differently, e.g. `Decimal("1.0")` and `Decimal("1.00")`, or `0.0`
+    # and `-0.0`.
+    return tuple([(str(k), str(v)) for k, v in params.items()])
+
+
+def _srcset_cache_key(path, params, options, kwargs):
+    # Return the normalized key of a `create_srcset` call, or `None` if
+    # any argument is unorderable. The order of params and options does
+    # not matter. Param values are keyed on the strings they are encoded
+    # from, and on their type, since e.g. a 'q' of `0` is ignored but a
+    # 'q' of `"0"` is not.
+    try:
+        frozen_params = tuple(
+            sorted([(str(k), str(v), v.__class__) for k, v in params.items()])
+        )
+        key = (
+            path,
+            frozen_params,
+            _freeze_value(options),
+            _freeze_value(kwargs.get("widths")),
+            _freeze_value(kwargs.get("start")),
+            _freeze_value(kwargs.get("stop")),
+            _freeze_value(kwargs.get("tol")),
+            bool(kwargs.get("disable_variable_quality", False)),
+        )
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _path_encoding_option(options):
+    return bool(options.get("disable_path_encoding", False))
+
+
+# Types whose `repr` is the same in every process and tells them apart.
+_CANONICAL_TYPES = frozenset([str, bytes, int, float, bool, type(None)])
+
+
+def _canonical(value, sort_items=False):
+    # Canonical string of a params or options value, for the keys of
+    # cache backends. Raises `TypeError` for other types, whose `repr`
+    # may differ between processes, e.g. include an object address.
+    # Only the items of `value` itself are sorted: nested values, such
+    # as a dict param value, are rendered with `str`, in their order.
+    cls = value.__class__
+    if cls in _CANONICAL_TYPES:
+        return repr(value)
+    if isinstance(value, Mapping):
+        items = [_canonical(k) + ":" + _canonical(v)
+                 for k, v in value.items()]
+        if sort_items:
+            items.sort()
+        return "{%s}" % ",".join(items)
+    if cls is list:
+        return "[%s]" % ",".join([_canonical(v) for v in value])
+    if cls is tuple:
+        return "(%s)" % ",".join([_canonical(v) for v in value])
+    raise TypeError("cannot canonicalize %r" % (cls,))
+
+
+def _freeze_value(value):
+    # Hashable representation of an options value, e.g. the variable
+    # qualities or device pixel ratios. Values are rendered with `str`,
+    # so they are keyed on that string; types are included too, since
+    # `1` and `True` differ, and validation may accept a list but not a
+    # tuple: whether a call raises must not depend on the cache.
+    if isinstance(value, Mapping):
+        return (
+            value.__class__,
+            tuple(sorted([(_freeze_value(k), _freeze_value(v))
+                          for k, v in value.items()])),
+        )
+    if isinstance(value, (list, tuple)):
+        return (value.__class__, tuple([_freeze_value(v) for v in value]))
+    return (str(value), value.__class__)
 
 
 def target_widths(start=MIN_WIDTH, stop=MAX_WIDTH, tol=TOLERANCE):
@@ -381,6 +1287,9 @@ def target_widths(start=MIN_WIDTH, stop=MAX_WIDTH, tol=TOLERANCE):
 
     https://html.spec.whatwg.org/multipage/images.html#image-candidate-string
 
+    The widths are validated and computed once per distinct (start, stop,
+    tol) triplet; later calls return a copy of the memoized widths.
+
     Parameters
     ----------
     start : int, optional
@@ -395,16 +1304,30 @@ def target_widths(start=MIN_WIDTH, stop=MAX_WIDTH, tol=TOLERANCE):
     list
         A list of even integer values.
     """
+    return list(_target_widths(start, stop, tol))
+
+
+def _target_widths(start, stop, tol):
+    # Memoized `target_widths`; falls back to computing the widths for
+    # unhashable arguments so that they fail validation as usual.
+    try:
+        return _cached_target_widths(start, stop, tol)
+    except TypeError:
+        return _cached_target_widths.__wrapped__(start, stop, tol)
+
+
+@lru_cache(maxsize=64)
+def _cached_target_widths(start, stop, tol):
     validate_min_max_tol(start, stop, tol)
     # If any value differs from the default, we're constructing a custom
     # target widths list.
     CUSTOM = any([tol != TOLERANCE, start != MIN_WIDTH, stop != MAX_WIDTH])
 
     if not CUSTOM:
-        return TARGET_WIDTHS
+        return tuple(TARGET_WIDTHS)
 
     if start == stop:
-        return [int(start)]
+        return (int(start),)
 
     resolutions = []
 
@@ -418,4 +1341,4 @@ def target_widths(start=MIN_WIDTH, stop=MAX_WIDTH, tol=TOLERANCE):
     if resolutions[-1] < stop:
         resolutions.append(int(stop))
 
-    return resolutions
+    return tuple(resolutions)
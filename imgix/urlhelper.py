@@ -1,9 +1,23 @@
 # -*- coding: utf-8 -*-
-import hashlib
-from urllib.parse import quote, urlunparse
-from base64 import urlsafe_b64encode
+from bisect import bisect_left, insort
+from functools import lru_cache
+from time import perf_counter
+from urllib.parse import quote, unquote, urlunparse
 
-from ._version import __version__
+from .cache import LRUCache
+from .config import get_config
+from .encoding import encode_param_value
+from .metrics import (
+    STAGE_PARAMS,
+    STAGE_SANITIZE,
+    STAGE_SIGN,
+    URL_HELPER_CALLS,
+)
+
+# The maximum number of parsed URLs kept by `UrlHelper.from_url`.
+FROM_URL_CACHE_SIZE = 4096
+
+_parse_cache = LRUCache(FROM_URL_CACHE_SIZE)
 
 
 class UrlHelper(object):
@@ -13,6 +27,9 @@ class UrlHelper(object):
       >>> str(UrlHelper('demos.imgix.net', '/bridge.png', params={'w': 100}))
       https://demos.imgix.net/bridge.png?w=100
 
+    The generated URL is cached until a parameter is set or deleted, and
+    only the changed parameter is re-encoded when it is generated again.
+
     Parameters
     ----------
     domain : str
@@ -30,13 +47,31 @@ class UrlHelper(object):
         added to the URL unprocessed. For a complete list of imgix
         supported parameters, visit https://docs.imgix.com/apis/url .
         (default {})
+    metrics : MetricsSink or None
+        When provided, calls and the time spent encoding the path,
+        building params and signing are reported to this sink, see
+        `imgix.metrics`. (default None, disabled)
 
     Methods
     -------
+    from_url(url, sign_key=None, use_cache=False)
     set_parameter(key, value)
     delete_parameter(key)
     """
 
+    # The domain, scheme, sign key and library parameter setting are held
+    # by an interned `Config`, shared by all the helpers of a domain.
+    __slots__ = (
+        "_config",
+        "_path",
+        "_parameters",
+        "_metrics",
+        "_fragments",
+        "_sorted_keys",
+        "_url",
+        "_path_encoded",
+    )
+
     def __init__(
             self,
             domain,
@@ -44,21 +79,106 @@ class UrlHelper(object):
             scheme="https",
             sign_key=None,
             include_library_param=True,
-            params={}):
+            params={},
+            metrics=None):
 
-        self._scheme = scheme
-        self._host = domain
+        self._config = get_config(
+            domain, scheme, sign_key, include_library_param
+        )
         self._path = path
-        self._sign_key = sign_key
-        self._include_library_param = include_library_param
         self._parameters = {}
+        self._metrics = metrics
+
+        # The encoded "key=value" fragment of each parameter, the sorted
+        # parameter keys and the rendered URL are kept up to date by
+        # `set_parameter` and `delete_parameter`, so that rendering only
+        # re-encodes what changed since the last render.
+        self._fragments = {}
+        self._sorted_keys = []
+        self._url = None
+        self._path_encoded = None
+
+        for key, value in self._config.base_params.items():
+            self._set_fragment(key, value)
 
         for key, value in params.items():
             self.set_parameter(key, value)
 
     @classmethod
-    def from_url(cls, url):
-        pass
+    def from_url(cls, url, sign_key=None, use_cache=False):
+        """
+        Create a `UrlHelper` from an existing imgix URL.
+
+        The URL is split into its scheme, host, path and query. Query
+        values are percent-decoded and the values of keys ending with '64'
+        are base64 decoded, so the helper re-encodes them as usual. The
+        'ixlib' and 's' (signature) parameters are stripped; if 'ixlib' was
+        present the helper includes the library parameter. The path is
+        kept exactly as it appears in `url`, already encoded, so that the
+        URLs created by `UrlBuilder` round-trip unchanged.
+
+          >>> helper = UrlHelper.from_url(
+          ...     "https://demos.imgix.net/bridge.png?w=100&txt64=aGk"
+          ... )
+          >>> helper.set_parameter("w", 200)
+          >>> str(helper)
+          https://demos.imgix.net/bridge.png?txt64=aGk&w=200
+
+        Parameters
+        ----------
+        url : str
+            Absolute imgix URL, e.g. 'https://demos.imgix.net/bridge.png'.
+        sign_key : str or None
+            When provided, URLs generated by the helper are signed with
+            this key.
+        use_cache : bool
+            If `True`, the parsed URL is looked up in, and added to, a
+            least-recently-used cache keyed by `url`, see
+            `from_url_cache_info`. (default `False`)
+
+        Returns
+        -------
+        UrlHelper
+
+        Raises
+        ------
+        ValueError
+            If `url` is not an absolute URL, or a '64' parameter is not
+            valid base64 encoded UTF-8.
+        """
+        if use_cache:
+            parsed = _parse_cache.get(url)
+            if parsed is None:
+                parsed = _parse_url(url)
+                _parse_cache.set(url, parsed)
+        else:
+            parsed = _parse_url(url)
+
+        scheme, host, path, params, include_library_param = parsed
+        helper = cls(
+            host,
+            path,
+            scheme=scheme,
+            sign_key=sign_key,
+            include_library_param=include_library_param,
+            params=dict(params),
+        )
+        if path:
+            # Already encoded: quoting it again would change the path,
+            # e.g. '/a@2x.png' to '/a%402x.png', and its signature.
+            helper._path_encoded = path
+        return helper
+
+    @staticmethod
+    def from_url_cache_info():
+        """
+        Return the statistics of the `from_url` cache.
+
+        Returns
+        -------
+        CacheInfo
+        """
+        return _parse_cache.cache_info()
 
     def set_parameter(self, key, value):
         """
@@ -74,11 +194,14 @@ class UrlHelper(object):
             value = str(value)
 
         if key.endswith('64'):
-            value = urlsafe_b64encode(value.encode('utf-8'))
-            value = value.replace(b'=', b'')
+            value = encode_param_value(key, value)
 
         self._parameters[key] = value
 
+        # The library parameter cannot be overridden.
+        if key != "ixlib" or not self._config.include_library_param:
+            self._set_fragment(key, value)
+
     def delete_parameter(self, key):
         """
         Deletes the value associated with `key` from recorded parameters.
@@ -95,6 +218,21 @@ class UrlHelper(object):
         if key in self._parameters:
             del self._parameters[key]
 
+            if key != "ixlib" or not self._config.include_library_param:
+                del self._fragments[key]
+                del self._sorted_keys[bisect_left(self._sorted_keys, key)]
+                self._url = None
+
+    def _set_fragment(self, key, value):
+        if key not in self._fragments:
+            insort(self._sorted_keys, key)
+        if not (value.__class__ is str and value.isascii()
+                and value.isalnum()):
+            # Only ASCII letters and digits are safe to skip quoting.
+            value = quote(value, "")
+        self._fragments[key] = _quote_key(key) + "=" + value
+        self._url = None
+
     def _str_is_ascii(self, s):
         try:
             s.decode('ascii')
@@ -110,16 +248,52 @@ class UrlHelper(object):
         -------
         str
         """
-        query = {}
+        url = self._url
+        if url is not None:
+            if self._metrics is not None:
+                self._metrics.increment(URL_HELPER_CALLS)
+            return url
+
+        if self._metrics is not None:
+            url = self._str_instrumented()
+        else:
+            path = self._encoded_path()
+            query = self._encoded_query()
+
+            if self._config.signer is not None:
+                query = self._sign(path, query)
+
+            url = self._join(path, query)
+
+        self._url = url
+        return url
 
-        for key in self._parameters:
-            query[key] = self._parameters[key]
+    def _str_instrumented(self):
+        # `__str__` reporting its calls and the time of each stage.
+        metrics = self._metrics
+        metrics.increment(URL_HELPER_CALLS)
 
-        path = self._path
+        t0 = perf_counter()
+        path = self._encoded_path()
+        t1 = perf_counter()
+        metrics.timing(STAGE_SANITIZE, t1 - t0)
 
-        if self._include_library_param:
-            query["ixlib"] = "python-" + __version__
+        query = self._encoded_query()
+        t2 = perf_counter()
+        metrics.timing(STAGE_PARAMS, t2 - t1)
 
+        if self._config.signer is not None:
+            query = self._sign(path, query)
+            metrics.timing(STAGE_SIGN, perf_counter() - t2)
+
+        return self._join(path, query)
+
+    def _encoded_path(self):
+        if self._path_encoded is None:
+            self._path_encoded = self._encode_path(self._path)
+        return self._path_encoded
+
+    def _encode_path(self, path):
         if path.startswith("http"):
             try:
                 path = quote(path, safe="~()*!.'")
@@ -135,23 +309,88 @@ class UrlHelper(object):
             except KeyError:
                 path = quote(path.encode('utf-8'))
 
-        query = "&".join(
-            (quote(key, "") + "=" + quote(query[key], ""))
-            for key in sorted(query))
+        return path
+
+    def _encoded_query(self):
+        fragments = self._fragments
+        return "&".join([fragments[key] for key in self._sorted_keys])
 
-        if self._sign_key:
-            delim = "" if query == "" else "?"
-            signing_value = self._sign_key + path + delim + query
-            signature = hashlib.md5(signing_value.encode('utf-8')).hexdigest()
-            if query:
-                query += "&s=" + signature
-            else:
-                query = "s=" + signature
+    def _sign(self, path, query):
+        delim = "" if query == "" else "?"
+        signature = self._config.signer.sign(path, delim + query)
+        if query:
+            return query + "&s=" + signature
+        return "s=" + signature
+
+    def _join(self, path, query):
+        config = self._config
+        if config.scheme and config.domain:
+            url = config.origin + path
+            return url + "?" + query if query else url
 
         return urlunparse([
-            self._scheme,
-            self._host,
+            config.scheme,
+            config.domain,
             path,
             "",
             query,
             "", ])
+
+
+@lru_cache(maxsize=1024)
+def _quote_key(key):
+    return quote(key, "")
+
+
+def _parse_url(url):
+    # Split `url` into its scheme, host, encoded path, decoded query
+    # params and whether the 'ixlib' param is present.
+    scheme, separator, rest = url.partition("://")
+    if not separator or not scheme:
+        raise ValueError("`url` must be an absolute URL, i.e. "
+                         + '"https://example.imgix.net/image.png".')
+
+    rest = rest.partition("#")[0]
+    rest, _, query = rest.partition("?")
+    slash = rest.find("/")
+    if slash == -1:
+        host, path = rest, ""
+    else:
+        host, path = rest[:slash], rest[slash:]
+
+    params = []
+    include_library_param = False
+
+    for pair in query.split("&"):
+        if not pair:
+            continue
+
+        key, _, value = pair.partition("=")
+        key = unquote(key)
+
+        if key == "s":
+            continue
+        if key == "ixlib":
+            include_library_param = True
+            continue
+
+        value = unquote(value)
+        if key.endswith("64"):
+            value = _decode_base64_value(key, value)
+
+        params.append((key, value))
+
+    return scheme, host, path, tuple(params), include_library_param
+
+
+def _decode_base64_value(key, value):
+    import binascii
+    from base64 import urlsafe_b64decode
+
+    try:
+        padding = "=" * (-len(value) % 4)
+        return urlsafe_b64decode(value + padding).decode("utf-8")
+    except (ValueError, binascii.Error):
+        raise ValueError(
+            "`%s` must be a base64 encoded UTF-8 string" % key
+        )
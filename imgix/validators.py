@@ -4,9 +4,19 @@ from .errors import (
     WidthRangeError,
     WidthToleranceError,
 )
+from .cache import LRUCache
 from .constants import IMAGE_ZERO_WIDTH as ZERO_WIDTH
 from .constants import SRCSET_MIN_WIDTH_TOLERANCE as ONE_PERCENT
 
+# The maximum number of valid domains remembered by `is_valid_domain`.
+DOMAIN_CACHE_SIZE = 4096
+
+_valid_domains = LRUCache(DOMAIN_CACHE_SIZE)
+
+_LOWER = frozenset("abcdefghijklmnopqrstuvwxyz")
+_LABEL_CHARS = _LOWER | frozenset("0123456789-")
+_SUBDOMAIN_CHARS = _LABEL_CHARS | frozenset("_")
+
 
 def validate_min_width(value):
     """
@@ -237,3 +247,81 @@ def validate_device_pixel_ratios(device_pixel_ratios):
         if not all_valid_dpr:
             raise DevicePixelRatiosError("`device_pixel_ratios` can only \
                 contain positive integer values between 1 and 5")
+
+
+def is_valid_domain(domain):
+    """
+    Return whether `domain` is a domain name accepted by imgix.
+
+    The result is the same as matching `constants.DOMAIN_PATTERN`, but it
+    is computed in a single pass over the labels of `domain`, so that
+    hostile input cannot trigger catastrophic backtracking. A domain is
+    a dot-separated sequence of:
+
+    * 0 to 125 labels of 1 to 62 lowercase letters, digits, '-' or '_';
+    * a label of 1 to 63 lowercase letters, digits or '-', starting with
+      a letter or digit and not ending with '-';
+    * a label of 1 to 63 lowercase letters or digits.
+
+    As with the pattern, digits are Unicode decimal digits and a single
+    trailing newline is accepted. Valid domains are remembered, so
+    validating the same domain again costs a cache lookup.
+
+    Parameters
+    ----------
+    domain : str
+
+    Returns
+    -------
+    bool
+    """
+    if _valid_domains.get(domain) is not None:
+        return True
+
+    if not _check_domain(domain):
+        return False
+
+    _valid_domains.set(domain, True)
+    return True
+
+
+def _check_domain(domain):
+    if not isinstance(domain, str):
+        raise TypeError("`domain` must be a `str`")
+
+    # `$` matches before a trailing newline.
+    if domain.endswith("\n"):
+        domain = domain[:-1]
+
+    labels = domain.split(".")
+    if not 2 <= len(labels) <= 127:
+        return False
+
+    last = labels[-1]
+    if not 1 <= len(last) <= 63 or not _has_only(last, _LOWER):
+        return False
+
+    label = labels[-2]
+    if not 1 <= len(label) <= 63 or not _has_only(label, _LABEL_CHARS):
+        return False
+    if label[0] == "-" or label[-1] == "-":
+        return False
+
+    for label in labels[:-2]:
+        if not 1 <= len(label) <= 62 or not _has_only(
+            label, _SUBDOMAIN_CHARS
+        ):
+            return False
+
+    return True
+
+
+def _has_only(label, allowed):
+    # Whether `label` only contains `allowed` characters or decimal
+    # digits, which `\d` matches in `str` patterns.
+    if allowed.issuperset(label):
+        return True
+    for c in label:
+        if c not in allowed and not c.isdecimal():
+            return False
+    return True
@@ -41,6 +41,9 @@ setup(
         'Programming Language :: Python :: 3.10',
         'Programming Language :: Python :: 3.11',
     ],
+    entry_points={
+        'console_scripts': ['imgix=imgix.__main__:main'],
+    },
     setup_requires=['pytest-runner'],
     extras_require={
         'dev': ['tox'],
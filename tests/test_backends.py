@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import imgix
+
+from imgix import backends
+from imgix.backends import CacheBackend, MemoryBackend, SQLiteBackend
+from imgix.errors import DevicePixelRatiosError, WidthRangeError
+from imgix.metrics import InMemorySink
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+PARAMS = {"auto": "format,compress", "w": 400}
+
+
+class RecordingBackend(MemoryBackend):
+    def __init__(self):
+        super(RecordingBackend, self).__init__()
+        self.calls = []
+
+    def get_many(self, keys):
+        self.calls.append(("get_many", list(keys)))
+        return super(RecordingBackend, self).get_many(keys)
+
+    def set_many(self, mapping):
+        self.calls.append(("set_many", dict(mapping)))
+        super(RecordingBackend, self).set_many(mapping)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryBackend()
+    else:
+        backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+        yield backend
+        backend.close()
+
+
+def test_backend_get_set_delete(backend):
+    assert backend.get_many([]) == {}
+    assert backend.get_many(["a"]) == {}
+
+    backend.set_many({"a": "1", "b": "2"})
+    assert backend.get_many(["a", "b", "c"]) == {"a": "1", "b": "2"}
+
+    backend.set_many({"a": "3"})
+    backend.delete_many(["b"])
+    assert backend.get_many(["a", "b"]) == {"a": "3"}
+
+    backend.clear()
+    assert backend.get_many(["a"]) == {}
+
+
+def test_base_backend_is_abstract():
+    with pytest.raises(NotImplementedError):
+        CacheBackend().get_many(["a"])
+    with pytest.raises(NotImplementedError):
+        CacheBackend().set_many({"a": "1"})
+
+
+def test_sqlite_backend_batches_large_lookups(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    mapping = {"key%d" % i: "value%d" % i for i in range(1234)}
+    backend.set_many(mapping)
+    assert backend.get_many(list(mapping)) == mapping
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteBackend(path).set_many({"a": "1"})
+    assert SQLiteBackend(path).get_many(["a"]) == {"a": "1"}
+
+
+def test_sqlite_backend_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(backends.time, "time", lambda: now[0])
+
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), ttl=10)
+    backend.set_many({"a": "1"})
+    now[0] = 1009.0
+    assert backend.get_many(["a"]) == {"a": "1"}
+
+    now[0] = 1010.0
+    assert backend.get_many(["a"]) == {}
+    assert backend.purge() == 1
+
+
+def test_sqlite_backend_threads(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    errors = []
+
+    def work(offset):
+        try:
+            for i in range(30):
+                key = "key%d" % ((i + offset) % 30)
+                if not backend.get_many([key]):
+                    backend.set_many({key: key})
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+        finally:
+            backend.close()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(backend.get_many(["key%d" % i for i in range(30)])) == 30
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_sqlite_backend_reconnects_after_fork(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    backend.set_many({"parent": "1"})
+    parent_connection = backend._local.connection
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        status = 1
+        try:
+            found = backend.get_many(["parent"])
+            backend.set_many({"child": "2"})
+            if (
+                found == {"parent": "1"}
+                and backend._local.connection is not parent_connection
+            ):
+                status = 0
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert backend._local.connection is parent_connection
+    assert backend.get_many(["parent", "child"]) == {
+        "parent": "1",
+        "child": "2",
+    }
+
+
+def test_sqlite_backend_rejects_invalid_table(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteBackend(str(tmp_path / "cache.sqlite3"), table="a; DROP")
+
+
+def test_memory_backend_cache_info():
+    backend = MemoryBackend(maxsize=1, ttl=60)
+    backend.set_many({"a": "1", "b": "2"})
+    assert len(backend) == 1
+    assert backend.cache_info().evictions == 1
+
+
+@pytest.mark.parametrize("sign_key", [None, TOKEN])
+def test_create_url_with_backend(backend, sign_key):
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=sign_key, cache_backend=backend)
+    uncached = imgix.UrlBuilder(DOMAIN, sign_key=sign_key)
+
+    for _ in range(2):
+        assert ub.create_url("image.jpg", PARAMS) == (
+            uncached.create_url("image.jpg", PARAMS)
+        )
+        assert ub.create_url("image.jpg") == uncached.create_url("image.jpg")
+        assert ub.create_url(
+            "a b.jpg", PARAMS, {"disable_path_encoding": True}
+        ) == uncached.create_url(
+            "a b.jpg", PARAMS, {"disable_path_encoding": True}
+        )
+
+
+def test_create_url_looks_up_backend_first():
+    backend = RecordingBackend()
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend)
+    url = ub.create_url("image.jpg", PARAMS)
+    assert [call for call, _ in backend.calls] == ["get_many", "set_many"]
+
+    key = backend.calls[0][1][0]
+    backend.set_many({key: "cached"})
+    assert ub.create_url("image.jpg", dict(reversed(PARAMS.items()))) == (
+        "cached"
+    )
+    assert ub.create_url("image.jpg", imgix.ImgixParams(PARAMS)) == "cached"
+    assert url != "cached"
+
+
+def test_create_urls_batches_lookups():
+    backend = RecordingBackend()
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, cache_backend=backend)
+    uncached = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN)
+    items = ["a.jpg", ("b.jpg", {"w": 100}), "c.jpg", ("a.jpg", {"h": 50})]
+
+    expected = list(uncached.create_urls(items, {"q": 50}))
+    assert list(ub.create_urls(items, {"q": 50}, chunk_size=3)) == expected
+    assert [call for call, _ in backend.calls] == [
+        "get_many",
+        "set_many",
+        "get_many",
+        "set_many",
+    ]
+
+    backend.calls = []
+    assert list(ub.create_urls(items, {"q": 50}, chunk_size=3)) == expected
+    assert [call for call, _ in backend.calls] == ["get_many", "get_many"]
+
+
+def test_create_srcsets_batches_lookups(backend):
+    recording = RecordingBackend()
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, cache_backend=recording)
+    uncached = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN)
+    items = ["a.jpg", ("b.jpg", {"w": 100}), ("c.jpg", {"h": 50, "ar": "1:1"})]
+
+    expected = [
+        uncached.create_srcset("a.jpg", {"q": 50}),
+        uncached.create_srcset("b.jpg", {"q": 50, "w": 100}),
+        uncached.create_srcset("c.jpg", {"q": 50, "h": 50, "ar": "1:1"}),
+    ]
+    for _ in range(2):
+        assert ub.create_srcsets(items, {"q": 50}) == expected
+    assert [call for call, _ in recording.calls] == [
+        "get_many",
+        "set_many",
+        "get_many",
+    ]
+    assert len(recording.calls[0][1]) == 3
+
+    assert uncached.create_srcsets(items, {"q": 50}) == expected
+
+
+def test_create_srcset_with_backend(backend):
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend, srcset_cache_size=4)
+    uncached = imgix.UrlBuilder(DOMAIN)
+    calls = [
+        ((), {}),
+        (({"w": 400},), {}),
+        (({"w": 400},), {"disable_variable_quality": True}),
+        (({}, {"device_pixel_ratios": [1, 2]}), {}),
+        (({},), {"widths": [100, 200]}),
+        (({},), {"start": 500, "stop": 2000, "tol": 0.2}),
+    ]
+    for _ in range(2):
+        for args, kwargs in calls:
+            assert ub.create_srcset("image.jpg", *args, **kwargs) == (
+                uncached.create_srcset("image.jpg", *args, **kwargs)
+            )
+
+
+def test_backend_does_not_skip_srcset_validation(backend):
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend)
+    ub.create_srcset("image.jpg", widths=[100, 200])
+    with pytest.raises(WidthRangeError):
+        ub.create_srcset("image.jpg", widths=(100, 200))
+    ub.create_srcset("image.jpg", {"w": 100}, {"device_pixel_ratios": [1, 2]})
+    with pytest.raises(DevicePixelRatiosError):
+        ub.create_srcset(
+            "image.jpg", {"w": 100}, {"device_pixel_ratios": (1, 2)}
+        )
+
+
+def test_backend_keys_depend_on_builder_settings():
+    backend = MemoryBackend()
+    builders = [
+        imgix.UrlBuilder(DOMAIN, cache_backend=backend),
+        imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, cache_backend=backend),
+        imgix.UrlBuilder(DOMAIN, sign_key="other", cache_backend=backend),
+        imgix.UrlBuilder(DOMAIN, use_https=False, cache_backend=backend),
+        imgix.UrlBuilder("other.imgix.net", cache_backend=backend),
+        imgix.UrlBuilder(
+            DOMAIN, include_library_param=False, cache_backend=backend
+        ),
+        imgix.UrlBuilder(
+            DOMAIN, default_params={"q": 50}, cache_backend=backend
+        ),
+        imgix.UrlBuilder(DOMAIN, cache_backend=backend).with_params(fit="max"),
+    ]
+    for _ in range(2):
+        urls = [ub.create_url("image.jpg", PARAMS) for ub in builders]
+        assert len(set(urls)) == len(builders)
+    assert len(backend) == len(builders)
+
+
+def test_backend_keys_distinguish_value_types():
+    backend = MemoryBackend()
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend)
+    for value in [1, 1.0, True, "1", [1], (1,)]:
+        ub.create_url("image.jpg", {"w": value})
+    assert len(backend) == 6
+
+
+def test_backend_keys_keep_the_order_of_nested_values():
+    backend = MemoryBackend()
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend)
+    uncached = imgix.UrlBuilder(DOMAIN)
+    for value in [{"a": 1, "b": 2}, {"b": 2, "a": 1}]:
+        assert ub.create_url("image.jpg", {"txt": value}) == (
+            uncached.create_url("image.jpg", {"txt": value})
+        )
+    assert len(backend) == 2
+
+
+def test_uncanonical_params_are_not_cached():
+    class Width(object):
+        def __str__(self):
+            return "100"
+
+    backend = MemoryBackend()
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=backend)
+    assert ub.create_url("image.jpg", {"w": Width()}) == (
+        imgix.UrlBuilder(DOMAIN).create_url("image.jpg", {"w": 100})
+    )
+    assert list(ub.create_urls([("image.jpg", {"w": Width()})])) == [
+        imgix.UrlBuilder(DOMAIN).create_url("image.jpg", {"w": 100})
+    ]
+    assert len(backend) == 0
+
+
+def test_backend_keys_are_short_and_stable_across_processes():
+    backend = RecordingBackend()
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, cache_backend=backend)
+    ub.create_url("image.jpg", PARAMS)
+    key = backend.calls[0][1][0]
+    assert len(key) <= 80 and key.isascii()
+
+    code = (
+        "import imgix\n"
+        "from imgix.backends import MemoryBackend\n"
+        "backend = MemoryBackend()\n"
+        "ub = imgix.UrlBuilder(%r, sign_key=%r, cache_backend=backend)\n"
+        "ub.create_url('image.jpg', %r)\n"
+        "print(list(backend._cache._data)[0])\n"
+    ) % (DOMAIN, TOKEN, dict(reversed(PARAMS.items())))
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, PYTHONHASHSEED="123")
+    output = subprocess.check_output([sys.executable, "-c", code], env=env)
+    assert output.decode().strip() == key
+
+
+def test_backend_metrics():
+    sink = InMemorySink()
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=MemoryBackend(), metrics=sink)
+    ub.create_url("image.jpg")
+    ub.create_url("image.jpg")
+    ub.create_srcsets(["a.jpg", "b.jpg"])
+    counters = sink.snapshot()["counters"]
+    assert counters["cache_backend.hits"] == 1
+    assert counters["cache_backend.misses"] == 3
+    assert counters["create_srcset.calls"] == 2
+
+
+def test_builder_pickles_without_backend():
+    ub = imgix.UrlBuilder(DOMAIN, cache_backend=MemoryBackend())
+    clone = pickle.loads(pickle.dumps(ub))
+    assert clone.create_url("image.jpg") == ub.create_url("image.jpg")
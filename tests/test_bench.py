@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import json
+
+from imgix import bench
+
+
+def test_run_reports_each_matching_benchmark():
+    report = bench.run(iterations=5, pattern="create_url/*")
+    names = set(report["results"])
+    assert "create_url/plain" in names
+    assert "create_url/base64" in names
+    assert not any(name.startswith("create_srcset") for name in names)
+
+    for result in report["results"].values():
+        assert result["ops_per_sec"] > 0
+        assert result["p50_us"] <= result["p90_us"] <= result["p99_us"]
+
+
+def test_compare():
+    report = bench.run(iterations=5, pattern="target_widths/*")
+    baseline = json.loads(json.dumps(report))
+    for result in baseline["results"].values():
+        result["ops_per_sec"] /= 2
+    del baseline["results"]["target_widths/custom"]
+
+    ratios = bench.compare(report, baseline)
+    assert list(ratios) == ["target_widths/default"]
+    assert round(ratios["target_widths/default"], 6) == 2
+
+
+def test_main_writes_json(tmp_path, capsys):
+    path = tmp_path / "report.json"
+    argv = ["-n", "5", "-k", "UrlHelper*", "--json", str(path)]
+    assert bench.main(argv) == 0
+    assert bench.main(argv[:4] + ["--compare", str(path)]) == 0
+
+    report = json.loads(path.read_text())
+    assert set(report["results"]) == {
+        "UrlHelper.__str__/plain",
+        "UrlHelper.__str__/signed",
+        "UrlHelper.__str__/set_parameter",
+    }
+    assert "vs base" in capsys.readouterr().out
+
+
+def test_run_reports_instance_sizes():
+    report = bench.run(iterations=5, pattern="target_widths/default")
+    sizes = report["instance_bytes"]
+    assert set(sizes) == {"UrlBuilder", "UrlHelper"}
+    assert all(size > 0 for size in sizes.values())
+    assert "instance" in bench.format_report(report)
+
+
+def test_run_reports_import_times():
+    report = bench.run(iterations=5, pattern="import/imgix", import_runs=1)
+    assert report["results"] == {}
+    assert list(report["import_us"]) == ["import/imgix"]
+    assert report["import_us"]["import/imgix"] > 0
+    assert "import/imgix" in bench.format_report(report)
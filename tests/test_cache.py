@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+import pytest
+
+from imgix.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", 2) == 2
+        assert "a" in cache
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_cache_info(self):
+        cache = LRUCache(1)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.set("b", 2)
+        info = cache.cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+        assert info.evictions == 1
+        assert info.maxsize == 1
+        assert info.currsize == 1
+
+        cache.clear()
+        assert cache.cache_info() == (0, 0, 0, 1, 0)
+
+    def test_pop(self):
+        cache = LRUCache(1)
+        cache.set("a", 1)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+
+    def test_invalid_maxsize_raises(self):
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+        with self.assertRaises(ValueError):
+            LRUCache(None)
+
+    def test_concurrent_access(self):
+        cache = LRUCache(64)
+
+        def work(offset):
+            for i in range(2000):
+                key = (i + offset) % 128
+                if cache.get(key) is None:
+                    cache.set(key, key)
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        info = cache.cache_info()
+        assert info.hits + info.misses == 8 * 2000
+        assert info.currsize <= 64
+
+
+def test_cache_info_hit_rate():
+    cache = LRUCache(1)
+    assert cache.cache_info().hit_rate == 0.0
+
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    assert cache.cache_info().hit_rate == 2 / 3
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expires_entries():
+    timer = FakeTimer()
+    cache = LRUCache(2, ttl=10, timer=timer)
+    cache.set("a", 1)
+    timer.now = 9.9
+    assert cache.get("a") == 1
+    assert "a" in cache
+
+    timer.now = 10
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+    cache.set("a", 2)
+    assert cache.get("a") == 2
+    assert cache.pop("a") == 2
+
+
+def test_ttl_must_be_positive():
+    with pytest.raises(ValueError):
+        LRUCache(1, ttl=0)
+
+
+def test_discard_if():
+    cache = LRUCache(4)
+    for key in [("a", 1), ("a", 2), ("b", 1)]:
+        cache.set(key, True)
+    cache.get(("b", 1))
+
+    assert cache.discard_if(lambda key: key[0] == "a") == 2
+    assert ("b", 1) in cache
+    assert len(cache) == 1
+    assert cache.cache_info().hits == 1
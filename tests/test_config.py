@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import gc
+import pickle
+
+import pytest
+
+from imgix import UrlBuilder
+from imgix.config import get_config
+from imgix.urlhelper import UrlHelper
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+
+
+def test_get_config_is_interned():
+    config = get_config(DOMAIN, "https", TOKEN, True)
+    assert get_config(DOMAIN, "https", TOKEN, True) is config
+    assert get_config(DOMAIN, "http", TOKEN, True) is not config
+    assert get_config(DOMAIN, "https", None, True) is not config
+    assert get_config(DOMAIN, "https", TOKEN, False) is not config
+
+
+def test_get_config_stores_key_sequences_as_tuples():
+    config = get_config(DOMAIN, "https", ["new", TOKEN])
+    assert config.sign_key == ("new", TOKEN)
+    assert get_config(DOMAIN, "https", ("new", TOKEN)) is config
+
+
+def test_config_default_query():
+    assert get_config(DOMAIN, "https", None, False).default_query == ""
+    assert get_config(DOMAIN).default_query.startswith("?ixlib=python-")
+
+
+def test_config_is_immutable():
+    config = get_config(DOMAIN)
+    with pytest.raises(AttributeError):
+        config.domain = "other.imgix.net"
+    with pytest.raises(AttributeError):
+        del config.sign_key
+
+
+def test_config_is_released_with_its_instances():
+    builder = UrlBuilder("released.imgix.net")
+    config = builder._config
+    assert get_config("released.imgix.net", "https", None, True) is config
+
+    del builder, config
+    gc.collect()
+    from imgix import config as config_module
+
+    assert ("released.imgix.net", "https", None, True) not in (
+        config_module._configs
+    )
+
+
+def test_config_pickles_to_interned_config():
+    config = get_config(DOMAIN, "https", TOKEN)
+    assert pickle.loads(pickle.dumps(config)) is config
+
+
+def test_builders_and_helpers_share_config():
+    first = UrlBuilder(DOMAIN, sign_key=TOKEN)
+    second = UrlBuilder(DOMAIN, sign_key=TOKEN)
+    helper = UrlHelper(DOMAIN, "/image.jpg", sign_key=TOKEN)
+
+    assert first._config is second._config is helper._config
+    assert first._signer is second._signer
+
+
+def test_instances_have_no_dict():
+    builder = UrlBuilder(DOMAIN)
+    helper = UrlHelper(DOMAIN, "/image.jpg")
+    for instance in (builder, helper):
+        assert not hasattr(instance, "__dict__")
+        with pytest.raises(AttributeError):
+            instance.unknown = 1
+
+
+def test_helper_pickles():
+    helper = UrlHelper(DOMAIN, "/image.jpg", sign_key=TOKEN, params={"w": 1})
+    clone = pickle.loads(pickle.dumps(helper))
+    assert str(clone) == str(helper)
+    assert clone._config is helper._config
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from imgix.encoding import (
+    clear_value_cache,
+    encode_param_key,
+    encode_param_value,
+    encode_params,
+    render_query,
+    value_cache_info,
+)
+
+
+def test_encode_param_value():
+    assert encode_param_value("w", 100) == "100"
+    assert encode_param_value("w", -1.5) == "-1.5"
+    assert encode_param_value("or", True) == "True"
+    assert encode_param_value("w", None) == "None"
+    assert encode_param_value("txt", "Futura+Condensed Medium") == (
+        "Futura%2BCondensed%20Medium"
+    )
+
+
+def test_encode_base64_param_value():
+    assert encode_param_value("txt64", "hello wörld") == "aGVsbG8gd8O2cmxk"
+    assert encode_param_value("txt64", 100) == "MTAw"
+
+
+def test_encode_params_and_render_query():
+    encoded = encode_params({"hello world": "a b", "a": 1})
+    assert encoded == {"hello%20world": "a%20b", "a": "1"}
+    assert render_query(encoded) == "?a=1&hello%20world=a%20b"
+    assert render_query({}) == ""
+    assert encode_param_key("a b") == "a%20b"
+
+
+def test_value_cache_info():
+    clear_value_cache()
+    for _ in range(3):
+        encode_param_value("mark64", "https://assets.imgix.net/logo.png")
+    encode_param_value("w", 100)
+
+    info = value_cache_info()
+    assert info.hits == 2
+    assert info.misses == 1
+    assert info.currsize == 1
+    assert info.evictions == 0
+    assert info.hit_rate == 2 / 3
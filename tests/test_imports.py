@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import subprocess
+import sys
+
+import imgix
+
+
+def _run(code):
+    # Run `code` in a new interpreter and return its standard output.
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout.split()
+
+
+def test_import_imgix_is_lazy():
+    # Only the package and its version are imported, whatever modules
+    # the interpreter imported at startup.
+    new_modules = _run(
+        "import sys; before = set(sys.modules); import imgix; "
+        "print(' '.join(sorted(set(sys.modules) - before)))"
+    )
+    assert new_modules == ["imgix", "imgix._version"]
+
+
+def test_lazy_attributes():
+    output = _run(
+        "import sys, imgix; "
+        "print(imgix.UrlBuilder.__module__); "
+        "print('imgix.urlbuilder' in sys.modules)"
+    )
+    assert output == ["imgix.urlbuilder", "True"]
+
+
+def test_public_names():
+    for name in imgix.__all__:
+        assert getattr(imgix, name) is not None
+    assert set(imgix.__all__) <= set(dir(imgix))
+    from imgix import BuilderRegistry, UrlBuilder  # noqa: F401
+
+
+def test_unknown_attribute_raises():
+    try:
+        imgix.NotAnAttribute
+    except AttributeError:
+        pass
+    else:
+        assert False
+
+
+def test_domain_pattern_is_compiled_lazily():
+    output = _run(
+        "import sys, imgix.constants as c; "
+        "print('DOMAIN_PATTERN' in vars(c)); "
+        "print(c.DOMAIN_PATTERN.match('assets.imgix.net') is not None); "
+        "print(c.DOMAIN_PATTERN is c.DOMAIN_PATTERN)"
+    )
+    assert output == ["False", "True", "True"]
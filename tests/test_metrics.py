@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import imgix
+
+from imgix.metrics import InMemorySink, MetricsSink, PrometheusTextSink
+from imgix.urlhelper import UrlHelper
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+
+
+def test_create_url_reports_calls_and_stages():
+    sink = InMemorySink()
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, metrics=sink)
+    url = ub.create_url("image.jpg", {"w": 100})
+    assert url == imgix.UrlBuilder(DOMAIN, sign_key=TOKEN).create_url(
+        "image.jpg", {"w": 100}
+    )
+
+    snapshot = sink.snapshot()
+    assert snapshot["counters"] == {"create_url.calls": 1}
+    assert set(snapshot["timings"]) == {"sanitize", "params", "sign"}
+    for timing in snapshot["timings"].values():
+        assert timing["count"] == 1
+        assert timing["seconds"] >= 0
+
+
+def test_unsigned_create_url_does_not_report_sign_stage():
+    sink = InMemorySink()
+    imgix.UrlBuilder(DOMAIN, metrics=sink).create_url("image.jpg")
+    assert "sign" not in sink.snapshot()["timings"]
+
+
+def test_path_cache_hits_and_misses():
+    sink = InMemorySink()
+    ub = imgix.UrlBuilder(DOMAIN, path_cache_size=10, metrics=sink)
+    for _ in range(3):
+        ub.create_url("image.jpg")
+
+    counters = sink.snapshot()["counters"]
+    assert counters["path_cache.misses"] == 1
+    assert counters["path_cache.hits"] == 2
+
+
+def test_srcset_reports_calls_and_assembly():
+    sink = InMemorySink()
+    ub = imgix.UrlBuilder(DOMAIN, metrics=sink)
+    ub.create_srcset("image.jpg")
+    list(ub.iter_srcset("image.jpg", widths=[100, 200]))
+    list(ub.create_urls(["image.jpg"]))
+
+    snapshot = sink.snapshot()
+    assert snapshot["counters"] == {
+        "create_srcset.calls": 1,
+        "iter_srcset.calls": 1,
+        "create_urls.calls": 1,
+    }
+    assert snapshot["timings"]["srcset"]["count"] == 2
+
+
+def test_url_helper_reports_calls_and_stages():
+    sink = InMemorySink()
+    helper = UrlHelper(DOMAIN, "image.jpg", sign_key=TOKEN, metrics=sink)
+    assert str(helper) == str(UrlHelper(DOMAIN, "image.jpg", sign_key=TOKEN))
+
+    snapshot = sink.snapshot()
+    assert snapshot["counters"] == {"url_helper.calls": 1}
+    assert set(snapshot["timings"]) == {"sanitize", "params", "sign"}
+
+
+def test_in_memory_sink_reset():
+    sink = InMemorySink()
+    sink.increment("a", 2)
+    sink.timing("b", 0.5)
+    sink.reset()
+    assert sink.snapshot() == {"counters": {}, "timings": {}}
+
+
+def test_prometheus_text_sink():
+    sink = PrometheusTextSink()
+    assert sink.render() == ""
+
+    sink.increment("create_url.calls")
+    sink.increment("create_url.calls")
+    sink.timing("sign", 0.25)
+    sink.timing("sign", 0.25)
+    assert sink.render() == (
+        "# TYPE imgix_create_url_calls_total counter\n"
+        "imgix_create_url_calls_total 2\n"
+        "# TYPE imgix_stage_seconds summary\n"
+        'imgix_stage_seconds_count{stage="sign"} 2\n'
+        'imgix_stage_seconds_sum{stage="sign"} 0.5\n'
+    )
+
+
+def test_custom_sink():
+    class ListSink(MetricsSink):
+        def __init__(self):
+            self.events = []
+
+        def increment(self, name, value=1):
+            self.events.append((name, value))
+
+        def timing(self, name, seconds):
+            self.events.append((name, "timing"))
+
+    sink = ListSink()
+    imgix.UrlBuilder(DOMAIN, metrics=sink).create_url("image.jpg")
+    assert sink.events == [
+        ("create_url.calls", 1),
+        ("sanitize", "timing"),
+        ("params", "timing"),
+    ]
+
+
+def test_srcset_cache_hits_and_misses():
+    sink = InMemorySink()
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=10, metrics=sink)
+    for _ in range(3):
+        ub.create_srcset("image.jpg")
+    counters = sink.snapshot()["counters"]
+    assert counters["create_srcset.calls"] == 3
+    assert counters["srcset_cache.misses"] == 1
+    assert counters["srcset_cache.hits"] == 2
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from urllib.parse import unquote_to_bytes, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+
+import imgix
+
+from imgix.middleware import (
+    ASGISignatureMiddleware,
+    SignatureVerifier,
+    WSGISignatureMiddleware,
+)
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+
+
+def _url(path="image.jpg", params={"w": 100}, sign_key=TOKEN):
+    return imgix.UrlBuilder(DOMAIN, sign_key=sign_key).create_url(
+        path, params
+    )
+
+
+def _wsgi_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"image"]
+
+
+def _wsgi_request(app, url, raw=True):
+    parts = urlsplit(url)
+    environ = {
+        # PATH_INFO is decoded, as latin-1 characters.
+        "PATH_INFO": unquote_to_bytes(parts.path).decode("latin-1"),
+        "QUERY_STRING": parts.query,
+    }
+    if raw:
+        environ["RAW_URI"] = parts.path + "?" + parts.query
+    setup_testing_defaults(environ)
+
+    statuses = []
+    body = b"".join(
+        app(environ, lambda status, headers: statuses.append(status))
+    )
+    return statuses[0], body
+
+
+def _asgi_request(app, url, raw=True):
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": unquote_to_bytes(parts.path).decode("utf-8"),
+        "query_string": parts.query.encode("ascii"),
+        "headers": [],
+    }
+    if raw:
+        scope["raw_path"] = parts.path.encode("ascii")
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages[0]["status"], b"".join(
+        m.get("body", b"") for m in messages[1:]
+    )
+
+
+async def _asgi_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"image"})
+
+
+def test_verifier_caches_valid_verdicts():
+    verifier = SignatureVerifier(TOKEN, cache_size=2)
+    parts = urlsplit(_url())
+
+    assert verifier.verify(parts.path, parts.query)
+    assert verifier.verify(parts.path, parts.query)
+    info = verifier.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_verifier_does_not_cache_invalid_verdicts():
+    verifier = SignatureVerifier(TOKEN)
+    parts = urlsplit(_url(sign_key="OTHER"))
+
+    assert not verifier.verify(parts.path, parts.query)
+    assert not verifier.verify(parts.path, "w=100")
+    assert verifier.cache_info().currsize == 0
+
+
+def test_verifier_without_cache():
+    verifier = SignatureVerifier(TOKEN, cache_size=0)
+    parts = urlsplit(_url())
+    assert verifier.verify(parts.path, parts.query)
+    assert verifier.cache_info() is None
+
+
+def test_verifier_accepts_rotated_keys():
+    verifier = SignatureVerifier(["NEW", TOKEN])
+    parts = urlsplit(_url())
+    assert verifier.verify(parts.path, parts.query)
+
+
+def test_verifier_requires_key():
+    with pytest.raises(ValueError):
+        SignatureVerifier(None)
+
+
+@pytest.mark.parametrize("raw", [True, False])
+@pytest.mark.parametrize(
+    "path",
+    [
+        "image.jpg",
+        "/ünicode image.jpg",
+        "https://assets.example.com/image.jpg?v=1",
+    ],
+)
+def test_wsgi_middleware(path, raw):
+    app = WSGISignatureMiddleware(_wsgi_app, TOKEN)
+
+    assert _wsgi_request(app, _url(path), raw) == ("200 OK", b"image")
+    assert _wsgi_request(app, _url(path, sign_key="OTHER"), raw) == (
+        "403 Forbidden",
+        b"Forbidden",
+    )
+    unsigned = "https://%s/image.jpg?w=100" % DOMAIN
+    assert _wsgi_request(app, unsigned, raw)[0] == "403 Forbidden"
+
+
+@pytest.mark.parametrize("raw", [True, False])
+@pytest.mark.parametrize(
+    "path",
+    [
+        "image.jpg",
+        "/ünicode image.jpg",
+        "https://assets.example.com/image.jpg?v=1",
+    ],
+)
+def test_asgi_middleware(path, raw):
+    app = ASGISignatureMiddleware(_asgi_app, TOKEN)
+
+    assert _asgi_request(app, _url(path), raw) == (200, b"image")
+    assert _asgi_request(app, _url(path, sign_key="OTHER"), raw) == (
+        403,
+        b"Forbidden",
+    )
+
+
+def test_asgi_middleware_passes_lifespan_through():
+    scopes = []
+
+    async def app(scope, receive, send):
+        scopes.append(scope["type"])
+
+    asyncio.run(
+        ASGISignatureMiddleware(app, TOKEN)({"type": "lifespan"}, None, None)
+    )
+    assert scopes == ["lifespan"]
+
+
+@pytest.mark.parametrize(
+    "sign_key, accepted", [(TOKEN, True), ("OTHER", False)]
+)
+def test_asgi_middleware_checks_websockets(sign_key, accepted):
+    parts = urlsplit(_url("socket", sign_key=sign_key))
+    scope = {
+        "type": "websocket",
+        "path": parts.path,
+        "raw_path": parts.path.encode("ascii"),
+        "query_string": parts.query.encode("ascii"),
+        "headers": [],
+    }
+    calls = []
+    messages = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["type"])
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(ASGISignatureMiddleware(app, TOKEN)(scope, None, send))
+    if accepted:
+        assert calls == ["websocket"] and messages == []
+    else:
+        assert calls == []
+        assert messages == [{"type": "websocket.close", "code": 1008}]
+
+
+def test_asgi_middleware_drops_unknown_scopes():
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["type"])
+
+    scope = {"type": "custom", "path": "/image.jpg", "query_string": b""}
+    asyncio.run(ASGISignatureMiddleware(app, TOKEN)(scope, None, None))
+    assert calls == []
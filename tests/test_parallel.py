@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import imgix
+
+from imgix import parallel
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+
+
+def _builder():
+    return imgix.UrlBuilder(
+        DOMAIN, sign_key=TOKEN, path_cache_size=10, srcset_cache_size=5
+    )
+
+
+def test_builder_pickles_as_configuration():
+    builder = _builder()
+    clone = pickle.loads(pickle.dumps(builder))
+    assert clone.create_url("image.jpg", {"w": 100}) == builder.create_url(
+        "image.jpg", {"w": 100}
+    )
+    assert clone.path_cache_info().maxsize == 10
+    assert clone.srcset_cache_info().maxsize == 5
+
+
+def test_create_urls_in_order():
+    builder = _builder()
+    items = [("image-%d.jpg" % i, {"w": i}) for i in range(50)]
+    expected = [
+        builder.create_url(path, {"fm": "png", **params})
+        for path, params in items
+    ]
+
+    actual = parallel.create_urls(
+        builder, items, {"fm": "png"}, workers=2, chunk_size=7, max_pending=2
+    )
+    assert list(actual) == expected
+
+
+def test_create_srcsets_in_order():
+    builder = _builder()
+    items = ["image-1.jpg", ("image-2.jpg", {"w": 100}), "image-3.jpg"]
+    expected = [
+        builder.create_srcset("image-1.jpg", {}, widths=[100, 200]),
+        builder.create_srcset("image-2.jpg", {"w": 100}, widths=[100, 200]),
+        builder.create_srcset("image-3.jpg", {}, widths=[100, 200]),
+    ]
+
+    actual = parallel.create_srcsets(
+        builder, items, workers=2, chunk_size=1, widths=[100, 200]
+    )
+    assert list(actual) == expected
+
+
+def test_invalid_chunk_size():
+    for chunk_size in [0, None]:
+        try:
+            parallel.create_urls(_builder(), [], chunk_size=chunk_size)
+        except ValueError:
+            assert True
+        else:
+            assert False
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import pytest
+
+import imgix
+
+from imgix import ImgixParams
+
+DOMAIN = "testing.imgix.net"
+TOKEN = "MYT0KEN"
+PARAMS = {"auto": "format,compress", "fit": "crop", "w": 400, "txt64": "hi!"}
+
+
+def test_mapping():
+    params = ImgixParams(PARAMS, h=300)
+    assert dict(params) == {**PARAMS, "h": 300}
+    assert params["w"] == 400
+    assert "h" in params and "q" not in params
+    assert len(params) == 5
+    assert params.get("q") is None
+    assert params == {**PARAMS, "h": 300}
+    assert repr(params).startswith("ImgixParams(")
+
+
+def test_query_string_is_sorted_and_encoded():
+    assert ImgixParams(w=400, auto="format,compress").query_string == (
+        "?auto=format%2Ccompress&w=400"
+    )
+    assert ImgixParams().query_string == ""
+
+
+def test_hashable_and_equal_by_query():
+    a = ImgixParams(PARAMS)
+    b = ImgixParams(dict(reversed(list(PARAMS.items()))))
+    assert a == b and hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert ImgixParams(w=1) != ImgixParams(w=True)
+
+
+def test_immutable():
+    params = ImgixParams(w=400)
+    with pytest.raises(TypeError):
+        params["w"] = 800
+    with pytest.raises(AttributeError):
+        params._params = {}
+
+
+def test_replace():
+    params = ImgixParams(PARAMS)
+    replaced = params.replace({"h": 300}, w=800)
+    assert dict(replaced) == {**PARAMS, "h": 300, "w": 800}
+    assert replaced.query_string == ImgixParams(dict(replaced)).query_string
+    assert params["w"] == 400
+    assert params.replace() is params
+    assert params.replace(ImgixParams(w=800)) == params.replace(w=800)
+
+
+def test_pickle():
+    params = ImgixParams(PARAMS)
+    clone = pickle.loads(pickle.dumps(params))
+    assert clone == params and clone.query_string == params.query_string
+
+
+@pytest.mark.parametrize("sign_key", [None, TOKEN])
+@pytest.mark.parametrize("include_library_param", [True, False])
+def test_builder_accepts_params(sign_key, include_library_param):
+    builder = imgix.UrlBuilder(
+        DOMAIN,
+        sign_key=sign_key,
+        include_library_param=include_library_param,
+    )
+    params = ImgixParams(PARAMS)
+
+    for _ in range(2):
+        assert builder.create_url("image.jpg", params) == builder.create_url(
+            "image.jpg", PARAMS
+        )
+    assert builder.create_srcset("image.jpg", params) == (
+        builder.create_srcset("image.jpg", PARAMS)
+    )
+    assert builder.compile("image.jpg", params)(h=10) == builder.create_url(
+        "image.jpg", {**PARAMS, "h": 10}
+    )
+    assert list(
+        builder.create_urls([("a.jpg", params), ("b.jpg", params)])
+    ) == [
+        builder.create_url("a.jpg", PARAMS),
+        builder.create_url("b.jpg", PARAMS),
+    ]
+    assert list(
+        builder.create_urls(["a.jpg", ("b.jpg", params)], {"q": 50})
+    ) == [
+        builder.create_url("a.jpg", {"q": 50}),
+        builder.create_url("b.jpg", {"q": 50, **PARAMS}),
+    ]
+
+
+def test_builder_with_default_params_accepts_params():
+    builder = imgix.UrlBuilder(DOMAIN, default_params={"fit": "max", "q": 80})
+    params = ImgixParams(PARAMS)
+    assert builder.create_url("image.jpg", params) == builder.create_url(
+        "image.jpg", PARAMS
+    )
+    assert builder.with_params(params).create_url("image.jpg") == (
+        builder.create_url("image.jpg", PARAMS)
+    )
+
+
+def test_params_shared_between_builders():
+    params = ImgixParams(PARAMS)
+    with_ixlib = imgix.UrlBuilder(DOMAIN)
+    without_ixlib = imgix.UrlBuilder(DOMAIN, include_library_param=False)
+    for _ in range(2):
+        assert with_ixlib.create_url("image.jpg", params) == (
+            with_ixlib.create_url("image.jpg", PARAMS)
+        )
+        assert without_ixlib.create_url("image.jpg", params) == (
+            without_ixlib.create_url("image.jpg", PARAMS)
+        )
+
+
+def test_ixlib_param_cannot_be_overridden():
+    builder = imgix.UrlBuilder(DOMAIN)
+    assert builder.create_url("image.jpg", ImgixParams(ixlib="custom")) == (
+        builder.create_url("image.jpg")
+    )
+
+
+def test_url_helper_accepts_params():
+    params = ImgixParams(PARAMS)
+    helper = imgix.urlhelper.UrlHelper(DOMAIN, "image.jpg", params=params)
+    assert str(helper) == str(
+        imgix.urlhelper.UrlHelper(DOMAIN, "image.jpg", params=PARAMS)
+    )
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+import imgix
+
+from imgix import BuilderRegistry
+
+TOKEN = "MYT0KEN"
+
+
+def test_get_creates_builders_lazily():
+    registry = BuilderRegistry(include_library_param=False)
+    registry.register("acme", "acme.imgix.net", sign_key=TOKEN)
+    assert len(registry) == 0
+    assert "acme" in registry
+
+    builder = registry.get("acme")
+    assert registry["acme"] is builder
+    assert builder.create_url("image.jpg", {"w": 100}) == imgix.UrlBuilder(
+        "acme.imgix.net", sign_key=TOKEN, include_library_param=False
+    ).create_url("image.jpg", {"w": 100})
+
+    info = registry.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_tenant_arguments_override_defaults():
+    registry = BuilderRegistry(include_library_param=False)
+    registry.register("acme", "acme.imgix.net", include_library_param=True)
+    assert "ixlib=" in registry.get("acme").create_url("image.jpg")
+
+
+def test_unknown_tenant_raises():
+    registry = BuilderRegistry()
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+    assert "unknown" not in registry
+
+
+def test_invalid_domain_raises_on_lookup():
+    registry = BuilderRegistry()
+    registry.register("acme", "https://acme.imgix.net")
+    with pytest.raises(ValueError):
+        registry.get("acme")
+
+
+def test_loader():
+    calls = []
+
+    def loader(tenant):
+        calls.append(tenant)
+        if tenant.startswith("tenant-"):
+            return {"domain": tenant + ".imgix.net", "sign_key": TOKEN}
+        return None
+
+    registry = BuilderRegistry(loader)
+    assert registry.get("tenant-1") is registry.get("tenant-1")
+    assert calls == ["tenant-1"]
+    with pytest.raises(KeyError):
+        registry.get("other")
+
+
+def test_lru_eviction():
+    registry = BuilderRegistry(maxsize=2)
+    for tenant in ("a", "b", "c"):
+        registry.register(tenant, tenant + ".imgix.net")
+
+    a = registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    registry.get("c")
+
+    assert len(registry) == 2
+    assert registry.cache_info().evictions == 1
+    assert registry.get("a") is a
+
+
+def test_register_and_invalidate_evict_builders():
+    registry = BuilderRegistry()
+    registry.register("acme", "acme.imgix.net", sign_key="old")
+    old = registry.get("acme")
+
+    registry.register("acme", "acme.imgix.net", sign_key="new")
+    new = registry.get("acme")
+    assert new is not old
+    assert new.verify_url(new.create_url("image.jpg"))
+
+    registry.invalidate("acme")
+    assert registry.get("acme") is not new
+
+    registry.unregister("acme")
+    with pytest.raises(KeyError):
+        registry.get("acme")
+
+
+def test_clear_resets_stats():
+    registry = BuilderRegistry()
+    registry.register("acme", "acme.imgix.net")
+    registry.get("acme")
+    registry.clear()
+    info = registry.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+
+
+def test_concurrent_lookups_share_one_builder():
+    registry = BuilderRegistry(maxsize=8)
+    registry.register("acme", "acme.imgix.net")
+    barrier = threading.Barrier(8)
+    builders = []
+
+    def lookup():
+        barrier.wait()
+        builders.append(registry.get("acme"))
+
+    threads = [threading.Thread(target=lookup) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builders) == 8
+    assert all(builder is builders[0] for builder in builders)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+import imgix
+
+from imgix import resign
+from imgix.__main__ import main
+
+DOMAIN = "testing.imgix.net"
+OLD_KEY = "OLDT0KEN"
+NEW_KEY = "NEWT0KEN"
+
+
+def _urls(sign_key, count=3):
+    builder = imgix.UrlBuilder(DOMAIN, sign_key=sign_key)
+    return [
+        builder.create_url("image-%d.jpg" % i, {"w": i, "auto": "format"})
+        for i in range(count)
+    ]
+
+
+def test_resign_url_replaces_signature():
+    old, new = _urls(OLD_KEY, 1)[0], _urls(NEW_KEY, 1)[0]
+    assert resign.resign_url(old, NEW_KEY) == new
+
+
+def test_resign_url_signs_unsigned_urls():
+    plain = imgix.UrlBuilder(DOMAIN, include_library_param=False)
+    signed = imgix.UrlBuilder(
+        DOMAIN, sign_key=NEW_KEY, include_library_param=False
+    )
+    assert resign.resign_url(
+        plain.create_url("image.jpg", {"w": 100}), NEW_KEY
+    ) == signed.create_url("image.jpg", {"w": 100})
+    assert resign.resign_url(
+        plain.create_url("image.jpg"), NEW_KEY
+    ) == signed.create_url("image.jpg")
+
+
+def test_resign_line_keeps_surrounding_fields():
+    old, new = _urls(OLD_KEY, 2), _urls(NEW_KEY, 2)
+    line = '7,%s,"%s",note\r\n' % tuple(old)
+    assert resign.resign_line(line, NEW_KEY) == '7,%s,"%s",note\r\n' % tuple(
+        new
+    )
+
+
+def test_resign_line_filters_domains():
+    old = _urls(OLD_KEY, 1)[0]
+    line = old + " " + old.replace(DOMAIN, "other.imgix.net")
+    resigned = resign.resign_line(line, NEW_KEY, domains=[DOMAIN])
+    assert resigned.split(" ") == [
+        _urls(NEW_KEY, 1)[0],
+        old.replace(DOMAIN, "other.imgix.net"),
+    ]
+
+
+def test_resign_line_unsigned_url_before_signed_url():
+    old, new = _urls(OLD_KEY, 1)[0], _urls(NEW_KEY, 1)[0]
+    for unsigned in [
+        "https://%s/x.png?w=1" % DOMAIN,
+        "https://%s/x.png" % DOMAIN,
+        "https://%s/x,y.png?w=1" % DOMAIN,
+    ]:
+        for separator in [",", ";", "|", ""]:
+            line = unsigned + separator + old
+            assert resign.resign_line(line, NEW_KEY) == (
+                unsigned + separator + new
+            )
+
+
+def test_resign_line_proxy_path_with_disabled_encoding():
+    options = {"disable_path_encoding": True}
+    path = "http://example.com/a.png"
+    old = imgix.UrlBuilder(DOMAIN, sign_key=OLD_KEY).create_url(
+        path, {"w": 1}, options
+    )
+    new = imgix.UrlBuilder(DOMAIN, sign_key=NEW_KEY).create_url(
+        path, {"w": 1}, options
+    )
+    assert resign.resign_line("a," + old + ",b", NEW_KEY) == (
+        "a," + new + ",b"
+    )
+
+
+def test_resign_line_html_escaped_urls():
+    old, new = _urls(OLD_KEY, 1)[0], _urls(NEW_KEY, 1)[0]
+    line = '<img src="%s">\n' % old.replace("&", "&amp;")
+    assert resign.resign_line(line, NEW_KEY) == (
+        '<img src="%s">\n' % new.replace("&", "&amp;")
+    )
+
+
+def test_resign_line_leaves_mixed_escaping_unchanged():
+    old = _urls(OLD_KEY, 1)[0]
+    for url in [
+        old.replace("&", "&amp;", 1),
+        old.replace("&s=", "&amp;s="),
+    ]:
+        assert resign.resign_line(url, NEW_KEY) == url
+
+
+def test_resign_lines_in_order():
+    old, new = _urls(OLD_KEY, 50), _urls(NEW_KEY, 50)
+    lines = [url + "\n" for url in old]
+    expected = [url + "\n" for url in new]
+    assert list(resign.resign_lines(lines, NEW_KEY, workers=1)) == expected
+    assert (
+        list(
+            resign.resign_lines(
+                iter(lines), NEW_KEY, workers=2, chunk_size=7, max_pending=2
+            )
+        )
+        == expected
+    )
+
+
+def test_resign_lines_requires_key():
+    with pytest.raises(ValueError):
+        resign.resign_lines([], None)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_resign_file(tmp_path, use_mmap):
+    old, new = _urls(OLD_KEY), _urls(NEW_KEY)
+    src, dst = tmp_path / "in.csv", tmp_path / "out.csv"
+    src.write_bytes(
+        ("id,url\n" + "".join("%d,%s\n" % p for p in enumerate(old))).encode(
+            "utf-8"
+        )
+        + b"\xff,not utf-8"
+    )
+
+    count = resign.resign_file(
+        str(src), str(dst), NEW_KEY, use_mmap=use_mmap, workers=1
+    )
+
+    assert count == len(old) + 2
+    assert dst.read_bytes() == (
+        "id,url\n" + "".join("%d,%s\n" % p for p in enumerate(new))
+    ).encode("utf-8") + b"\xff,not utf-8"
+
+
+def test_resign_empty_file_with_mmap(tmp_path):
+    src, dst = tmp_path / "in.csv", tmp_path / "out.csv"
+    src.write_bytes(b"")
+    assert resign.resign_file(str(src), str(dst), NEW_KEY, use_mmap=True) == 0
+    assert dst.read_bytes() == b""
+
+
+def test_resign_stream_leaves_output_open():
+    src, dst = io.BytesIO(_urls(OLD_KEY, 1)[0].encode("ascii")), io.BytesIO()
+    resign.resign_stream(src, dst, NEW_KEY, workers=1)
+    assert dst.getvalue().decode("ascii") == _urls(NEW_KEY, 1)[0]
+
+
+def test_cli_resign(tmp_path, monkeypatch):
+    src, dst = tmp_path / "in.txt", tmp_path / "out.txt"
+    src.write_text("\n".join(_urls(OLD_KEY)) + "\n")
+    monkeypatch.setenv("IMGIX_SIGN_KEY", NEW_KEY)
+
+    assert main(["resign", str(src), "-o", str(dst), "--workers", "1"]) == 0
+    assert dst.read_text() == "\n".join(_urls(NEW_KEY)) + "\n"
+
+
+def test_cli_resign_requires_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("IMGIX_SIGN_KEY", raising=False)
+    with pytest.raises(SystemExit):
+        main(["resign", str(tmp_path / "in.txt")])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+import pytest
+
+import imgix
+
+from imgix.middleware import SignatureVerifier
+from imgix.signing import (
+    KeySet,
+    Signer,
+    create_signer,
+    split_signed_url,
+)
+
+TOKEN = "FOO123bar"
+
+
+def _md5(value):
+    return hashlib.md5(value.encode("utf-8")).hexdigest()
+
+
+def test_sign_matches_md5_of_signature_base():
+    signer = Signer(TOKEN)
+    path, query = "/users/1.png", "?h=300&w=400"
+    assert signer.sign(path, query) == _md5(TOKEN + path + query)
+
+
+def test_sign_without_path_or_query():
+    signer = Signer(TOKEN)
+    assert signer.sign("") == _md5(TOKEN)
+    assert signer.sign("/users/1.png") == _md5(TOKEN + "/users/1.png")
+
+
+def test_sign_unicode_path_and_query():
+    signer = Signer(TOKEN)
+    path, query = "/ساندویچ.jpg", "?txt=ǝ"
+    assert signer.sign(path, query) == _md5(TOKEN + path + query)
+
+
+def test_seeded_states_are_not_mutated():
+    signer = Signer(TOKEN)
+    first = signer.sign("/image.jpg", "?w=100")
+    signer.sign("/image.jpg", "?w=200")
+    assert signer.sign("/image.jpg", "?w=100") == first
+
+
+def test_path_cache_is_bounded():
+    signer = Signer(TOKEN, path_cache_size=2)
+    for i in range(10):
+        path = "/image-%d.jpg" % i
+        assert signer.sign(path, "?w=1") == _md5(TOKEN + path + "?w=1")
+    assert len(signer._path_states) <= 2
+
+
+def test_split_signed_url():
+    assert split_signed_url(
+        "https://demos.imgix.net/image.png?w=100&s=abc#fragment"
+    ) == ("https://demos.imgix.net", "/image.png", "?w=100", "abc")
+    assert split_signed_url("https://demos.imgix.net?s=abc") == (
+        "https://demos.imgix.net", "", "", "abc"
+    )
+    assert split_signed_url("/image.png?s=abc") == (
+        "", "/image.png", "", "abc"
+    )
+    assert split_signed_url("/http://ex.com/a.png?w=1&s=abc") == (
+        "", "/http://ex.com/a.png", "?w=1", "abc"
+    )
+
+
+def test_split_unsigned_url():
+    assert split_signed_url("https://demos.imgix.net/image.png") is None
+    assert split_signed_url("https://demos.imgix.net/image.png?w=1") is None
+    assert split_signed_url("https://demos.imgix.net/a.png?s=1&w=1") is None
+
+
+def test_verify():
+    signer = Signer(TOKEN)
+    signature = signer.sign("/image.png", "?w=100")
+    assert signer.verify("/image.png", "?w=100", signature)
+    assert not signer.verify("/image.png", "?w=101", signature)
+    assert not signer.verify("/image.png", "?w=100", signature.upper())
+    assert not signer.verify("/image.png", "?w=100", "ǝ" * 32)
+
+
+def test_key_set_signs_with_first_key():
+    keys = KeySet([TOKEN, "old1", "old2"])
+    assert len(keys) == 3
+    assert keys.sign("/image.png", "?w=1") == _md5(TOKEN + "/image.png?w=1")
+
+
+def test_key_set_match():
+    keys = KeySet([TOKEN, "old1", "old2"])
+    for index, key in enumerate([TOKEN, "old1", "old2"]):
+        signature = _md5(key + "/image.png?w=1")
+        assert keys.match("/image.png", "?w=1", signature) == index
+        assert keys.verify("/image.png", "?w=1", signature)
+
+    signature = _md5("other/image.png?w=1")
+    assert keys.match("/image.png", "?w=1", signature) is None
+    assert not keys.verify("/image.png", "?w=1", "ǝ")
+
+
+def test_create_signer():
+    assert create_signer(None) is None
+    assert create_signer("") is None
+    assert create_signer([]) is None
+    assert isinstance(create_signer(TOKEN), Signer)
+    assert isinstance(create_signer([TOKEN]), Signer)
+    assert isinstance(create_signer([TOKEN, "old"]), KeySet)
+
+
+def test_empty_or_non_str_keys_in_sequences_raise():
+    for sign_keys in [[TOKEN, ""], [""], ["", TOKEN], [TOKEN, None], [1]]:
+        with pytest.raises(ValueError):
+            create_signer(sign_keys)
+        with pytest.raises(ValueError):
+            KeySet(sign_keys)
+        with pytest.raises(ValueError):
+            imgix.UrlBuilder("testing.imgix.net", sign_key=sign_keys)
+        with pytest.raises(ValueError):
+            SignatureVerifier(sign_keys)
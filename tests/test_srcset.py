@@ -5,6 +5,10 @@ import unittest
 import hashlib
 import re
 
+from decimal import Decimal
+
+import pytest
+
 from imgix.errors import WidthRangeError, WidthToleranceError
 from imgix.constants import DPR_QUALITIES
 from imgix.constants import SRCSET_TARGET_WIDTHS as TARGET_WIDTHS
@@ -517,3 +521,241 @@ class TestSrcsetRaises(unittest.TestCase):
         ub = imgix.UrlBuilder(DOMAIN, include_library_param=False)
         with self.assertRaises(WidthToleranceError):
             ub.create_srcset(JPG_PATH, tol=0)
+
+    def test_iter_srcset_raises_before_iteration(self):
+        ub = imgix.UrlBuilder(DOMAIN, include_library_param=False)
+        with self.assertRaises(WidthRangeError):
+            ub.iter_srcset(JPG_PATH, start=0)
+
+        with self.assertRaises(WidthToleranceError):
+            ub.iter_srcset(JPG_PATH, tol=0)
+
+        with self.assertRaises(WidthRangeError):
+            ub.iter_srcset(JPG_PATH, widths=[-100])
+
+
+def _reference_srcset_pairs(ub, path, params, options, targets):
+    srcset_params = dict(params)
+    entries = []
+    for w in targets:
+        srcset_params["w"] = w
+        entries.append(
+            ub.create_url(path, srcset_params, options) + " " + str(w) + "w"
+        )
+    return ",\n".join(entries)
+
+
+def _reference_srcset_dpr(ub, path, params, options, qualities, targets):
+    srcset_params = dict(params)
+    entries = []
+    for dpr in targets:
+        srcset_params["dpr"] = dpr
+        quality = params.get("q") or qualities.get(dpr)
+        if quality:
+            srcset_params["q"] = quality
+        entries.append(
+            ub.create_url(path, srcset_params, options) + " " + str(dpr) + "x"
+        )
+    return ",\n".join(entries)
+
+
+def test_srcset_engine_matches_create_url():
+    builders = [
+        imgix.UrlBuilder(DOMAIN),
+        imgix.UrlBuilder(DOMAIN, sign_key=TOKEN),
+        imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, include_library_param=False),
+    ]
+    params_list = [
+        {},
+        {"fm": "webp", "txt64": "hello wörld", "ixlib": "custom"},
+        {"a key": "a value+", "zz": 1.5, "blend64": "x"},
+        {"a b": 1, "a%20b": 2},
+    ]
+    paths = [JPG_PATH_WITH_SPACE, "http://avatars.com/john smith.png", ""]
+    for ub in builders:
+        for params in params_list:
+            for path in paths:
+                expected = _reference_srcset_pairs(
+                    ub, path, params, {}, TARGET_WIDTHS
+                )
+                assert ub.create_srcset(path, params) == expected
+
+
+def test_srcset_engine_dpr_matches_create_url():
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN)
+    qualities = {1: 80, 2: 0, 3: 40}
+    options = {"variable_qualities": qualities}
+    for params in [{"w": 100}, {"h": 50, "q": 10}, {"w": 100, "dpr": 9}]:
+        expected = _reference_srcset_dpr(
+            ub, JPG_PATH, params, {}, DPR_QUALITIES, range(1, 6)
+        )
+        assert ub.create_srcset(JPG_PATH, params) == expected
+
+        expected = _reference_srcset_dpr(
+            ub, JPG_PATH, params, options, qualities, range(1, 4)
+        )
+        assert ub.create_srcset(JPG_PATH, params, options) == expected
+
+
+def test_iter_srcset_yields_url_descriptor_pairs():
+    ub = imgix.UrlBuilder(DOMAIN, include_library_param=False)
+    candidates = list(ub.iter_srcset(JPG_PATH, widths=[100, 200]))
+    assert candidates == [
+        ("https://testing.imgix.net/image.jpg?w=100", "100w"),
+        ("https://testing.imgix.net/image.jpg?w=200", "200w"),
+    ]
+
+
+def test_iter_srcset_dpr():
+    ub = imgix.UrlBuilder(DOMAIN, include_library_param=False)
+    options = {"device_pixel_ratios": [1, 2]}
+    candidates = list(ub.iter_srcset(JPG_PATH, {"w": 100}, options))
+    assert candidates == [
+        ("https://testing.imgix.net/image.jpg?dpr=1&q=75&w=100", "1x"),
+        ("https://testing.imgix.net/image.jpg?dpr=2&q=50&w=100", "2x"),
+    ]
+
+
+def test_iter_srcset_joined_matches_create_srcset():
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN)
+    cases = [
+        ({}, {}, {}),
+        ({}, {}, {"start": 500, "stop": 2000, "tol": 0.2}),
+        ({}, {}, {"widths": [144, 240]}),
+        ({"w": 100}, {"variable_qualities": {1: 45, 2: 30}}, {}),
+        ({"h": 100, "ar": "3:2"}, {}, {"disable_variable_quality": True}),
+    ]
+    for params, options, kwargs in cases:
+        chunks = ub.iter_srcset(JPG_PATH, params, options, True, **kwargs)
+        expected = ub.create_srcset(JPG_PATH, params, options, **kwargs)
+        assert "".join(chunks) == expected
+
+
+def test_srcset_cache_returns_cached_srcset():
+    ub = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN, srcset_cache_size=16)
+    uncached = imgix.UrlBuilder(DOMAIN, sign_key=TOKEN)
+
+    calls = [
+        ((JPG_PATH,), {}),
+        ((JPG_PATH, {"w": 400}), {}),
+        ((JPG_PATH, {"w": 400}), {"disable_variable_quality": True}),
+        ((JPG_PATH, {"h": 200, "ar": "3:2"}), {}),
+        ((JPG_PATH, {}), {"widths": [100, 200]}),
+        ((JPG_PATH, {}), {"start": 500, "stop": 2000, "tol": 0.2}),
+        ((JPG_PATH, {"w": 400}, {"device_pixel_ratios": [1, 2]}), {}),
+        ((JPG_PATH, {"w": 400}, {"variable_qualities": {1: 80}}), {}),
+    ]
+    for _ in range(2):
+        for args, kwargs in calls:
+            assert ub.create_srcset(*args, **kwargs) == (
+                uncached.create_srcset(*args, **kwargs)
+            )
+
+    info = ub.srcset_cache_info()
+    assert info.hits == info.misses == info.currsize == len(calls)
+
+
+def test_srcset_cache_is_bounded():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=2)
+    for width in [100, 200, 300, 100]:
+        ub.create_srcset(JPG_PATH, {"w": width})
+    info = ub.srcset_cache_info()
+    assert info.misses == 4 and info.evictions == 2 and info.currsize == 2
+
+
+def test_srcset_cache_key_is_order_insensitive():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=4)
+    ub.create_srcset(JPG_PATH, {"w": 400, "fit": "crop"})
+    ub.create_srcset(JPG_PATH, {"fit": "crop", "w": 400})
+    ub.create_srcset(JPG_PATH, {"fit": "crop", "w": 400.0})
+    ub.create_srcset(JPG_PATH, imgix.ImgixParams(w=400, fit="crop"))
+    assert ub.srcset_cache_info().hits == 2
+    assert ub.srcset_cache_info().currsize == 2
+
+
+def test_srcset_cache_keys_unhashable_values_on_their_string():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=4)
+    text = bytearray(b"hi")
+    srcset = ub.create_srcset(JPG_PATH, {"w": 400, "txt": text})
+    text.extend(b"!")
+    assert ub.create_srcset(JPG_PATH, {"w": 400, "txt": text}) != srcset
+    assert ub.srcset_cache_info().currsize == 2
+
+
+def test_invalidate_srcsets():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=8)
+    ub.create_srcset(JPG_PATH)
+    ub.create_srcset(JPG_PATH, {"w": 400})
+    ub.create_srcset(JPG_PATH_WITH_SPACE)
+
+    assert ub.invalidate_srcsets(JPG_PATH) == 2
+    assert ub.srcset_cache_info().currsize == 1
+    assert ub.invalidate_srcsets() == 1
+    assert ub.srcset_cache_info().currsize == 0
+    assert imgix.UrlBuilder(DOMAIN).invalidate_srcsets() == 0
+
+
+def test_srcset_cache_disabled_by_default():
+    ub = imgix.UrlBuilder(DOMAIN)
+    assert ub.srcset_cache_info() is None
+
+
+def test_with_params_does_not_share_srcset_cache():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=4, srcset_cache_ttl=60)
+    srcset = ub.create_srcset(JPG_PATH)
+    derived = ub.with_params(fit="crop")
+    assert derived.create_srcset(JPG_PATH) != srcset
+    assert derived.srcset_cache_info().misses == 1
+    assert derived.srcset_cache_info().maxsize == 4
+
+
+def test_srcset_cache_invalid_arguments_raise():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=4)
+    for _ in range(2):
+        with pytest.raises(WidthRangeError):
+            ub.create_srcset(JPG_PATH, start=-1)
+
+
+def test_srcset_cache_tells_apart_values_rendered_differently():
+    ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=16)
+    uncached = imgix.UrlBuilder(DOMAIN)
+    calls = [
+        ({"w": 100, "ar": Decimal("1.5")}, {}),
+        ({"w": 100, "ar": Decimal("1.50")}, {}),
+        ({"w": 100, "q": 0}, {}),
+        ({"w": 100, "q": "0"}, {}),
+        ({"w": 100}, {"variable_qualities": {1: Decimal("50.0")}}),
+        ({"w": 100}, {"variable_qualities": {1: Decimal("50.00")}}),
+    ]
+    for params, options in calls:
+        assert ub.create_srcset(JPG_PATH, params, options) == (
+            uncached.create_srcset(JPG_PATH, params, options)
+        )
+
+
+def _srcset_outcome(builder, args, kwargs):
+    try:
+        return builder.create_srcset(JPG_PATH, *args, **kwargs)
+    except Exception as e:
+        return e.__class__
+
+
+def test_srcset_cache_does_not_skip_validation():
+    sequences = [
+        [((), {"widths": [100, 200]}), ((), {"widths": (100, 200)})],
+        [
+            (({"w": 100}, {"device_pixel_ratios": [1, 2]}), {}),
+            (({"w": 100}, {"device_pixel_ratios": (1, 2)}), {}),
+        ],
+        [
+            ((), {"start": 100, "stop": 200}),
+            ((), {"start": 100.0, "stop": 200}),
+        ],
+    ]
+    uncached = imgix.UrlBuilder(DOMAIN)
+    for calls in sequences:
+        ub = imgix.UrlBuilder(DOMAIN, srcset_cache_size=16)
+        for args, kwargs in calls:
+            assert _srcset_outcome(ub, args, kwargs) == (
+                _srcset_outcome(uncached, args, kwargs)
+            )
@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+import pickle
+
+from decimal import Decimal
+
 import imgix
 
 from imgix import constants
@@ -367,3 +371,361 @@ def test_target_widths_328_to_328():
     expected = [328]
     actual = urlbuilder.target_widths(start=328, stop=328)
     assert actual == expected
+
+
+def test_compile_matches_create_url():
+    builder = _default_builder_with_signature()
+    template = builder.compile("/users/1.png", {"fm": "webp", "w": 100})
+    for params in [{}, {"w": 400}, {"w": 400, "h": 300}, {"txt64": "hi!"}]:
+        expected = builder.create_url(
+            "/users/1.png", {"fm": "webp", "w": 100, **params}
+        )
+        assert template(params) == expected
+        assert template(**params) == expected
+
+
+def test_compile_without_params():
+    builder = _default_builder()
+    template = builder.compile("/users/1.png")
+    assert template() == "https://my-social-network.imgix.net/users/1.png"
+    assert (
+        template(w=400)
+        == "https://my-social-network.imgix.net/users/1.png?w=400"
+    )
+
+
+def test_compile_does_not_override_ixlib():
+    builder = imgix.UrlBuilder("my-social-network.imgix.net")
+    template = builder.compile("/users/1.png")
+    assert template(ixlib="custom") == builder.create_url(
+        "/users/1.png", {"ixlib": "custom"}
+    )
+
+
+def test_compile_with_disabled_path_encoding():
+    builder = _default_builder()
+    template = builder.compile(
+        "&$+,:;=?@#.jpg", options={"disable_path_encoding": True}
+    )
+    assert template(w=1) == (
+        "https://my-social-network.imgix.net/&$+,:;=?@#.jpg?w=1"
+    )
+
+
+def test_path_cache_disabled_by_default():
+    builder = _default_builder()
+    assert builder.path_cache_info() is None
+
+
+def test_path_cache():
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        include_library_param=False,
+        path_cache_size=2,
+    )
+    uncached = _default_builder()
+    paths = ["/users/1.png", "http://avatars.com/john smith.png", "ǝ.png"]
+    for path in paths + paths:
+        assert builder.create_url(path) == uncached.create_url(path)
+
+    options = {"disable_path_encoding": True}
+    assert builder.create_url("ǝ.png", options=options) == (
+        uncached.create_url("ǝ.png", options=options)
+    )
+
+    info = builder.path_cache_info()
+    assert info.misses == 7
+    assert info.evictions == 5
+    assert info.currsize == 2
+
+
+def test_create_urls_matches_create_url():
+    builder = _default_builder_with_signature()
+    shared = {"fm": "webp"}
+    items = [
+        "/users/1.png",
+        ("/users/2.png", {"w": 400}),
+        ("http://avatars.com/john-smith.png", {"w": 400}),
+        ("/users/3.png", {"w": 400, "fm": "png"}),
+        ("/users/4.png", {"w": 1.0}),
+        ("/users/5.png", {"w": True}),
+        ("/users/6.png", {"w": [1]}),
+        ("", {}),
+    ]
+    expected = []
+    for item in items:
+        path, params = (item, {}) if isinstance(item, str) else item
+        expected.append(builder.create_url(path, {**shared, **params}))
+
+    for chunk_size in [1, 3, 1000]:
+        urls = builder.create_urls(items, shared, chunk_size=chunk_size)
+        assert list(urls) == expected
+
+
+def test_create_urls_is_lazy():
+    builder = _default_builder()
+
+    def paths():
+        yield "/users/1.png"
+        raise AssertionError("consumed past the first chunk")
+
+    urls = builder.create_urls(paths(), chunk_size=1)
+    assert next(urls) == "https://my-social-network.imgix.net/users/1.png"
+
+
+def test_create_urls_with_disabled_path_encoding():
+    builder = _default_builder()
+    urls = builder.create_urls(
+        ["ساندویچ.jpg"], options={"disable_path_encoding": True}
+    )
+    assert list(urls) == ["https://my-social-network.imgix.net/ساندویچ.jpg"]
+
+
+def test_create_urls_invalid_chunk_size():
+    builder = _default_builder()
+    for chunk_size in [0, -1, None]:
+        try:
+            builder.create_urls([], chunk_size=chunk_size)
+        except ValueError:
+            assert True
+        else:
+            assert False
+
+
+def test_target_widths_returns_a_new_list():
+    actual = urlbuilder.target_widths(start=328, stop=4087)
+    actual.append(0)
+    assert urlbuilder.target_widths(start=328, stop=4087)[-1] == 4087
+
+    default = urlbuilder.target_widths()
+    default.append(0)
+    assert constants.SRCSET_TARGET_WIDTHS[-1] == IMAGE_MAX_WIDTH
+
+
+def test_target_widths_are_memoized():
+    urlbuilder._cached_target_widths.cache_clear()
+    builder = _default_builder()
+    for _ in range(3):
+        builder.create_srcset("image.jpg", start=500, stop=2000)
+    urlbuilder.target_widths(start=500, stop=2000)
+
+    info = urlbuilder._cached_target_widths.cache_info()
+    assert info.misses == 1
+    assert info.hits == 3
+
+
+def test_target_widths_with_unhashable_values_raise():
+    from imgix.errors import WidthRangeError
+
+    try:
+        urlbuilder.target_widths(start=[100])
+    except WidthRangeError:
+        assert True
+    else:
+        assert False
+
+
+def test_verify_url():
+    builder = _default_builder_with_signature()
+    for path, params in [
+        ("/users/1.png", {}),
+        ("/users/1.png", {"w": 400, "txt64": "hello"}),
+        ("http://avatars.com/john-smith.png", {"w": 400}),
+        ("/ǝ.png", {"w": 400}),
+    ]:
+        url = builder.create_url(path, params)
+        assert builder.verify_url(url)
+        assert builder.verify_url(url[url.index("/", 8):])
+
+    url = builder.create_url("/users/1.png", {"w": 400})
+    assert not builder.verify_url(url.replace("w=400", "w=401"))
+    assert not builder.verify_url(url.replace("1.png", "2.png"))
+    assert not builder.verify_url(url[:-1] + "0")
+    assert not builder.verify_url(url.split("&s=")[0])
+
+    other = imgix.UrlBuilder("my-social-network.imgix.net", sign_key="BAR")
+    assert not other.verify_url(url)
+
+
+def test_verify_url_with_scheme_in_path():
+    builder = _default_builder_with_signature()
+    url = builder.create_url(
+        "http://avatars.com/john-smith.png",
+        {"w": 400},
+        options={"disable_path_encoding": True},
+    )
+    assert "/http://avatars.com/" in url
+    assert builder.verify_url(url)
+    assert builder.verify_url(url[url.index("/", 8):])
+
+
+def test_verify_urls():
+    builder = _default_builder_with_signature()
+    urls = [builder.create_url("/users/%d.png" % i) for i in range(3)]
+    urls[1] += "0"
+    assert list(builder.verify_urls(urls)) == [True, False, True]
+
+
+def test_verify_url_without_sign_key_raises():
+    builder = _default_builder()
+    for verify in [builder.verify_url, builder.verify_urls]:
+        try:
+            verify("https://my-social-network.imgix.net/users/1.png?s=abc")
+        except ValueError:
+            assert True
+        else:
+            assert False
+
+
+def test_sign_key_rotation():
+    current = _default_builder_with_signature()
+    old = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        sign_key="OLD",
+        include_library_param=False,
+    )
+    rotating = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        sign_key=["FOO123bar", "OLD"],
+        include_library_param=False,
+    )
+
+    url = current.create_url("/users/1.png", {"w": 400})
+    assert rotating.create_url("/users/1.png", {"w": 400}) == url
+    assert rotating.create_srcset("/users/1.png") == (
+        current.create_srcset("/users/1.png")
+    )
+
+    old_url = old.create_url("/users/1.png", {"w": 400})
+    assert list(rotating.verify_urls([url, old_url, old_url + "0"])) == [
+        True,
+        True,
+        False,
+    ]
+    assert not current.verify_url(old_url)
+
+
+def _builders_with_defaults(**kwargs):
+    # A builder with default params and the same builder without them.
+    defaults = {"auto": "format,compress", "fit": "crop", "txt64": "hi!"}
+    with_defaults = imgix.UrlBuilder(
+        "my-social-network.imgix.net", default_params=defaults, **kwargs
+    )
+    plain = imgix.UrlBuilder("my-social-network.imgix.net", **kwargs)
+    return defaults, with_defaults, plain
+
+
+def test_default_params():
+    for sign_key in [None, "FOO123bar"]:
+        defaults, builder, plain = _builders_with_defaults(sign_key=sign_key)
+        for params in [{}, {"w": 400}, {"fit": "max", "h": 300}]:
+            merged = {**defaults, **params}
+            assert builder.create_url("/users/1.png", params) == (
+                plain.create_url("/users/1.png", merged)
+            )
+            assert builder.compile("/users/1.png", params)(q=50) == (
+                plain.create_url("/users/1.png", {**merged, "q": 50})
+            )
+            items = ["/a.png", ("/b.png", params)]
+            assert list(builder.create_urls(items)) == [
+                plain.create_url("/a.png", defaults),
+                plain.create_url("/b.png", merged),
+            ]
+            assert builder.create_srcset("/users/1.png", params) == (
+                plain.create_srcset("/users/1.png", merged)
+            )
+
+
+def test_default_params_do_not_override_ixlib():
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net", default_params={"ixlib": "custom"}
+    )
+    assert builder.create_url("/users/1.png").endswith(
+        "?ixlib=python-" + imgix._version.__version__
+    )
+
+
+def test_default_params_select_dpr_srcset():
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        include_library_param=False,
+        default_params={"w": 100, "q": 90},
+    )
+    plain = imgix.UrlBuilder(
+        "my-social-network.imgix.net", include_library_param=False
+    )
+    srcset = builder.create_srcset("/users/1.png")
+    assert srcset == plain.create_srcset("/users/1.png", {"w": 100, "q": 90})
+    assert srcset.endswith("dpr=5&q=90&w=100 5x")
+
+
+def test_default_params_are_copied():
+    defaults = {"fit": "crop"}
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        include_library_param=False,
+        default_params=defaults,
+    )
+    defaults["fit"] = "max"
+    assert builder.create_url("/users/1.png").endswith("?fit=crop")
+
+
+def test_with_params():
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net",
+        sign_key="FOO123bar",
+        path_cache_size=8,
+        default_params={"auto": "format"},
+    )
+    thumbnails = builder.with_params({"fit": "crop"}, w=200, auto="compress")
+    plain = imgix.UrlBuilder(
+        "my-social-network.imgix.net", sign_key="FOO123bar"
+    )
+
+    assert thumbnails.create_url("/users/1.png", {"h": 200}) == (
+        plain.create_url(
+            "/users/1.png",
+            {"auto": "compress", "fit": "crop", "w": 200, "h": 200},
+        )
+    )
+    # The parent builder is unchanged and shares its path cache.
+    assert builder.create_url("/users/1.png") == plain.create_url(
+        "/users/1.png", {"auto": "format"}
+    )
+    assert thumbnails.path_cache_info().hits == 1
+
+
+def test_default_params_pickle():
+    builder = imgix.UrlBuilder(
+        "my-social-network.imgix.net", default_params={"fit": "crop"}
+    ).with_params(w=100)
+    clone = pickle.loads(pickle.dumps(builder))
+    assert clone.create_url("/users/1.png") == builder.create_url(
+        "/users/1.png"
+    )
+
+
+def test_create_urls_tells_apart_equal_values_rendered_differently():
+    builder = imgix.UrlBuilder(
+        "testing.imgix.net", include_library_param=False
+    )
+    for values in [
+        (Decimal("1.0"), Decimal("1.00")),
+        (0.0, -0.0),
+        (1, True),
+    ]:
+        items = [("/a.png", {"q": value}) for value in values]
+        assert list(builder.create_urls(items)) == [
+            builder.create_url(path, params) for path, params in items
+        ]
+
+
+def test_builders_without_default_params_share_them():
+    first = imgix.UrlBuilder("testing.imgix.net")
+    second = imgix.UrlBuilder("testing.imgix.net", default_params={})
+    assert first._default_params is second._default_params
+    assert first._defaults is second._defaults
+    assert first._default_query is second._default_query
+    assert pickle.loads(pickle.dumps(first)).create_url("a.png") == (
+        first.create_url("a.png")
+    )
@@ -312,3 +312,148 @@ def test_delete_all_parameters():
     helper.delete_parameter("w")
     helper.delete_parameter("h")
     assert str(helper) == "https://my-social-network.imgix.net/users/1.png"
+
+
+def test_from_url():
+    helper = UrlHelper.from_url(
+        "http://my-social-network.imgix.net/users/1.png"
+        "?w=400&hello%20world=a%20b&ixlib=python-0.0.1&s=abc#fragment"
+    )
+    assert helper._config.scheme == "http"
+    assert helper._config.domain == "my-social-network.imgix.net"
+    assert helper._path == "/users/1.png"
+    assert helper._parameters == {"w": "400", "hello world": "a b"}
+    assert helper._config.include_library_param is True
+
+
+def test_from_url_without_path_or_query():
+    helper = UrlHelper.from_url("https://my-social-network.imgix.net")
+    assert helper._path == ""
+    assert helper._parameters == {}
+    assert helper._config.include_library_param is False
+
+
+def test_from_url_decodes_base64_params():
+    helper = UrlHelper.from_url(
+        "https://my-social-network.imgix.net/~text?txt64="
+        "SSBjYW5uw7h0IGJlbMOuw6l24oiRIGl0IHdvcu-jv3MhIPCfmLE"
+    )
+    helper.set_parameter("w", 100)
+    assert str(helper) == (
+        "https://my-social-network.imgix.net/~text?txt64="
+        "SSBjYW5uw7h0IGJlbMOuw6l24oiRIGl0IHdvcu-jv3MhIPCfmLE&w=100"
+    )
+
+
+def test_from_url_round_trips_builder_urls():
+    builder = imgix.UrlBuilder("my-social-network.imgix.net", sign_key="FOO")
+    cases = [
+        ("/users/1.png", {"w": 400, "h": 300}),
+        ("/üsers/1/でのパ.png", {"txt64": "I cannøt belîév∑ it!"}),
+        ("http://avatars.com/john-smith.png", {"fit": "crop"}),
+        ("/users/1.png", {}),
+        ("/a@2x.png", {"w": 100}),
+        ("/a,b.png", {}),
+        ("/a=b&c$d;e.png", {"q": 50}),
+        ("/a b/c%d.png", {}),
+    ]
+    for path, params in cases:
+        url = builder.create_url(path, params)
+        assert str(UrlHelper.from_url(url, sign_key="FOO")) == url
+
+
+def test_from_url_keeps_encoded_path():
+    url = "https://my-social-network.imgix.net/a@2x%20b.png?w=100"
+    helper = UrlHelper.from_url(url, sign_key="FOO")
+    assert helper._path == "/a@2x%20b.png"
+    assert str(helper).startswith(
+        "https://my-social-network.imgix.net/a@2x%20b.png?w=100&s="
+    )
+
+
+def test_from_url_invalid_urls_raise():
+    for url in [
+        "my-social-network.imgix.net/users/1.png",
+        "https://my-social-network.imgix.net/?txt64=%FF%FF",
+    ]:
+        try:
+            UrlHelper.from_url(url)
+        except ValueError:
+            assert True
+        else:
+            assert False
+
+
+def test_from_url_cache():
+    url = "https://my-social-network.imgix.net/users/1.png?w=400"
+    before = UrlHelper.from_url_cache_info()
+    first = UrlHelper.from_url(url, use_cache=True)
+    second = UrlHelper.from_url(url, use_cache=True)
+    after = UrlHelper.from_url_cache_info()
+
+    assert after.misses - before.misses <= 1
+    assert after.hits - before.hits >= 1
+
+    # Cached parses must not share mutable state.
+    first.set_parameter("h", 300)
+    assert "h" not in second._parameters
+
+
+def test_rendered_url_is_cached_until_parameters_change():
+    helper = UrlHelper(
+        "my-social-network.imgix.net",
+        "/users/1.png",
+        sign_key="FOO123bar",
+        include_library_param=False,
+        params={"w": 400},
+    )
+    first = str(helper)
+    assert str(helper) is first
+
+    helper.set_parameter("h", 300)
+    assert str(helper) == (
+        "https://my-social-network.imgix.net/users/1.png"
+        "?h=300&w=400&s=1a4e48641614d1109c6a7af51be23d18"
+    )
+
+    helper.delete_parameter("h")
+    assert str(helper) == first
+
+    helper.delete_parameter("missing")
+    assert str(helper) == first
+
+
+def test_set_parameter_overwrites_encoded_value():
+    helper = UrlHelper(
+        "my-social-network.imgix.net",
+        "/users/1.png",
+        include_library_param=False,
+    )
+    for w in [100, 200, 300]:
+        helper.set_parameter("w", w)
+        helper.set_parameter("a", w)
+        assert str(helper) == (
+            "https://my-social-network.imgix.net/users/1.png"
+            "?a=%d&w=%d" % (w, w)
+        )
+
+
+def test_ixlib_parameter_cannot_be_overridden():
+    helper = UrlHelper("my-social-network.imgix.net", "/users/1.png")
+    expected = str(helper)
+
+    helper.set_parameter("ixlib", "custom")
+    assert str(helper) == expected
+
+    helper.delete_parameter("ixlib")
+    assert str(helper) == expected
+
+    helper = UrlHelper(
+        "my-social-network.imgix.net",
+        "/users/1.png",
+        include_library_param=False,
+        params={"ixlib": "custom"},
+    )
+    assert str(helper) == (
+        "https://my-social-network.imgix.net/users/1.png?ixlib=custom"
+    )
@@ -1,6 +1,10 @@
+import random
+import re
 import unittest
 
+from imgix import validators
 from imgix.constants import (
+    DOMAIN_PATTERN,
     IMAGE_MIN_WIDTH,
     IMAGE_MAX_WIDTH,
     IMAGE_ZERO_WIDTH,
@@ -8,6 +12,7 @@ from imgix.constants import (
 )
 
 from imgix.validators import (
+    is_valid_domain,
     validate_min_width,
     validate_max_width,
     validate_range,
@@ -84,3 +89,78 @@ class TestValidators(unittest.TestCase):
     def test_validate_widths_raise(self):
         with self.assertRaises(WidthRangeError):
             validate_widths([2, 3, 4, 5, 6, -7])
+
+
+class TestValidateDomain(unittest.TestCase):
+    def _assert_same_as_pattern(self, domain):
+        expected = re.match(DOMAIN_PATTERN, domain) is not None
+        self.assertEqual(
+            validators._check_domain(domain), expected, repr(domain)
+        )
+
+    def test_valid_domains(self):
+        for domain in [
+            "assets.imgix.net",
+            "my-social-network-1.imgix.net",
+            "a_b.c-d.e1",
+            "٣.net",
+            "assets.imgix.net\n",
+            ".".join(["a" * 62] * 125 + ["b" * 63, "c" * 63]),
+        ]:
+            self._assert_same_as_pattern(domain)
+            self.assertTrue(is_valid_domain(domain), domain)
+
+    def test_invalid_domains(self):
+        for domain in [
+            "",
+            "net",
+            "assets.imgix.net/products",
+            "https://assets.imgix.net",
+            "assets.imgix.net-products",
+            "Assets.imgix.net",
+            "assets.-imgix.net",
+            "assets.imgix-.net",
+            "assets.im_gix.net",
+            "assets..imgix.net",
+            "assets.imgix.net.",
+            "assets.imgix.net\n\n",
+            ".".join(["a" * 63, "b", "c"]),
+            ".".join(["a", "b" * 64, "c"]),
+            ".".join(["a", "b", "c" * 64]),
+            ".".join(["a"] * 128),
+            "a" + "-" * 5000 + "!",
+        ]:
+            self._assert_same_as_pattern(domain)
+            self.assertFalse(is_valid_domain(domain), domain)
+
+    def test_same_results_as_pattern(self):
+        rng = random.Random(20)
+        alphabet = "ab9-_.\n\u0663A /"
+        for _ in range(20000):
+            length = rng.choice([1, 2, 3, 5, 8, 13])
+            self._assert_same_as_pattern(
+                "".join(rng.choice(alphabet) for _ in range(length))
+            )
+
+        for _ in range(300):
+            labels = [
+                "".join(
+                    rng.choice("ab1-_")
+                    for _ in range(rng.choice([1, 2, 62, 63, 64]))
+                )
+                for _ in range(rng.choice([2, 3, 126, 127, 128]))
+            ]
+            self._assert_same_as_pattern(".".join(labels))
+
+    def test_valid_domains_are_cached(self):
+        validators._valid_domains.clear()
+        self.assertTrue(is_valid_domain("cached.imgix.net"))
+        self.assertTrue(is_valid_domain("cached.imgix.net"))
+        self.assertFalse(is_valid_domain("https://cached.imgix.net"))
+
+        info = validators._valid_domains.cache_info()
+        self.assertEqual((info.hits, info.currsize), (1, 1))
+
+    def test_non_str_domain_raises(self):
+        with self.assertRaises(TypeError):
+            is_valid_domain(b"assets.imgix.net")